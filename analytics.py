@@ -0,0 +1,219 @@
+import heapq
+import logging
+from array import array
+
+from gradebook import Gradebook
+from gradebook_snapshot import MISSING
+
+
+def percentile(sorted_values, p):
+    """
+    Перцентиль отсортированной последовательности с линейной интерполяцией.
+
+    Args:
+        sorted_values (sequence): Отсортированные значения.
+        p (float): Перцентиль от 0 до 100.
+
+    Returns:
+        float: Значение перцентиля (0.0 для пустой последовательности).
+    """
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * p / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+class CohortAnalytics:
+    """
+    Аналитика по всем студентам журнала.
+
+    Файл оценок читается один раз и хранится в колонках array: коды студентов и
+    предметов (словари строк в names/subjects) и значения оценок и результатов тестов.
+    Все агрегаты считаются проходами по колонкам, без создания объектов Student.
+
+    Колонки берутся из бинарного снимка журнала (GradebookSnapshot): если журнал новых
+    записей пуст, это memoryview поверх отображенного файла снимка, без копирования.
+
+    Attributes:
+        names (list): Имена студентов; индекс в списке - код студента.
+        subjects (list): Названия предметов; индекс в списке - код предмета.
+        student_codes (array | memoryview): Код студента для каждой записи.
+        subject_codes (array | memoryview): Код предмета для каждой записи.
+        grades (array | memoryview): Оценка для каждой записи (MISSING, если нет).
+        test_scores (array | memoryview): Результат теста для каждой записи (MISSING, если нет).
+    """
+
+    def __init__(self):
+        self.names = []
+        self.subjects = []
+        self.student_codes = array('I')
+        self.subject_codes = array('H')
+        self.grades = array('b')
+        self.test_scores = array('b')
+
+    @classmethod
+    def load(cls, subjects_file):
+        """
+        Загрузка журнала оценок в колонки за один проход.
+
+        Args:
+            subjects_file (str): Путь к файлу с предметами и оценками.
+
+        Returns:
+            CohortAnalytics: Заполненный объект аналитики.
+        """
+        analytics = cls()
+        gradebook = Gradebook.open(subjects_file)
+        snapshot, journal_rows = gradebook.read_snapshot()
+        if snapshot is None:
+            analytics._append_rows(gradebook.iter_rows(), {}, {})
+        elif not journal_rows:
+            # Колонки снимка используются напрямую (memoryview поверх mmap)
+            analytics.names = snapshot.names
+            analytics.subjects = snapshot.subjects
+            analytics.student_codes = snapshot.student_codes
+            analytics.subject_codes = snapshot.subject_codes
+            analytics.grades = snapshot.grades
+            analytics.test_scores = snapshot.test_scores
+        else:
+            # Колонки снимка копируются целиком (frombytes) и дополняются записями журнала
+            analytics.names = list(snapshot.names)
+            analytics.subjects = list(snapshot.subjects)
+            for column in ('student_codes', 'subject_codes', 'grades', 'test_scores'):
+                getattr(analytics, column).frombytes(getattr(snapshot, column).cast('B'))
+            analytics._append_rows(
+                journal_rows,
+                {name: code for code, name in enumerate(analytics.names)},
+                {subject: code for code, subject in enumerate(analytics.subjects)}
+            )
+        logging.info(f"Загружено записей для аналитики: {len(analytics.grades)} из файла {subjects_file}")
+        return analytics
+
+    def _append_rows(self, rows, name_codes, subject_codes):
+        """
+        Дописывание записей в колонки.
+
+        Args:
+            rows (iterable): Кортежи (имя, предмет, оценка, результат теста).
+            name_codes (dict): Имя -> код студента (дополняется новыми именами).
+            subject_codes (dict): Предмет -> код предмета (дополняется новыми предметами).
+        """
+        for name, subject, grade, test_score in rows:
+            name_code = name_codes.get(name)
+            if name_code is None:
+                name_code = name_codes[name] = len(self.names)
+                self.names.append(name)
+            subject_code = subject_codes.get(subject)
+            if subject_code is None:
+                subject_code = subject_codes[subject] = len(self.subjects)
+                self.subjects.append(subject)
+            self.student_codes.append(name_code)
+            self.subject_codes.append(subject_code)
+            self.grades.append(MISSING if grade is None else grade)
+            self.test_scores.append(MISSING if test_score is None else test_score)
+
+    def _group_means(self, codes, values, size):
+        """
+        Средние значения колонки values по группам codes.
+
+        Returns:
+            list: Среднее для каждой группы или None, если значений в группе нет.
+        """
+        totals = [0] * size
+        counts = [0] * size
+        for code, value in zip(codes, values):
+            if value != MISSING:
+                totals[code] += value
+                counts[code] += 1
+        return [total / count if count else None for total, count in zip(totals, counts)]
+
+    def student_averages(self):
+        """
+        Средний балл каждого студента по всем предметам.
+
+        Returns:
+            dict: Имя студента -> средний балл (студенты без оценок не включаются).
+        """
+        means = self._group_means(self.student_codes, self.grades, len(self.names))
+        return {name: mean for name, mean in zip(self.names, means) if mean is not None}
+
+    def subject_averages(self):
+        """
+        Средняя оценка и средний результат тестов по каждому предмету.
+
+        Returns:
+            dict: Предмет -> (средняя оценка, средний результат тестов); None, если значений нет.
+        """
+        grade_means = self._group_means(self.subject_codes, self.grades, len(self.subjects))
+        score_means = self._group_means(self.subject_codes, self.test_scores, len(self.subjects))
+        return {subject: (grade, score) for subject, grade, score in zip(self.subjects, grade_means, score_means)}
+
+    def percentiles(self, ps=(25, 50, 75, 90)):
+        """
+        Перцентили средних баллов студентов.
+
+        Args:
+            ps (iterable): Перцентили от 0 до 100.
+
+        Returns:
+            dict: Перцентиль -> значение.
+        """
+        values = sorted(self.student_averages().values())
+        return {p: percentile(values, p) for p in ps}
+
+    def top_students(self, n=10):
+        """
+        Студенты с наибольшим средним баллом.
+
+        Args:
+            n (int): Количество студентов.
+
+        Returns:
+            list: Пары (имя, средний балл) по убыванию среднего балла.
+        """
+        return heapq.nlargest(n, self.student_averages().items(), key=lambda item: item[1])
+
+    def grade_distribution(self):
+        """
+        Распределение оценок (2-5) по предметам.
+
+        Returns:
+            dict: Предмет -> {оценка: количество}.
+        """
+        counts = [[0] * 6 for _ in self.subjects]
+        for code, grade in zip(self.subject_codes, self.grades):
+            if 2 <= grade <= 5:
+                counts[code][grade] += 1
+        return {subject: {grade: row[grade] for grade in range(2, 6)} for subject, row in zip(self.subjects, counts)}
+
+    def report(self, kind, top=10):
+        """
+        Текстовый отчет для командной строки.
+
+        Args:
+            kind (str): Вид отчета: students, subjects, percentiles, top, distribution.
+            top (int): Количество студентов для отчета top.
+
+        Returns:
+            list: Строки отчета.
+        """
+        if kind == 'students':
+            return [f"{name}: {mean:.2f}" for name, mean in self.student_averages().items()]
+        if kind == 'subjects':
+            return [
+                f"{subject}: средняя оценка {'-' if grade is None else f'{grade:.2f}'}, "
+                f"средний результат тестов {'-' if score is None else f'{score:.2f}'}"
+                for subject, (grade, score) in self.subject_averages().items()
+            ]
+        if kind == 'percentiles':
+            return [f"p{p}: {value:.2f}" for p, value in self.percentiles().items()]
+        if kind == 'top':
+            return [f"{place}. {name}: {mean:.2f}" for place, (name, mean) in enumerate(self.top_students(top), start=1)]
+        if kind == 'distribution':
+            return [
+                f"{subject}: " + ", ".join(f"{grade} - {count}" for grade, count in row.items())
+                for subject, row in self.grade_distribution().items()
+            ]
+        raise ValueError(f"Неизвестный вид отчета: {kind}")
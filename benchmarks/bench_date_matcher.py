@@ -0,0 +1,87 @@
+# Сравнение разбора текстов дат: прежний путь (свободное регулярное выражение,
+# поиск в словарях и KeyError) и пословный разбор по таблицам форм, собранным из словарей.
+# Запуск: python benchmarks/bench_date_matcher.py --phrases 200000
+
+import datetime
+import importlib
+import os
+import random
+import re
+import sys
+import time
+from argparse import ArgumentParser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+dates = importlib.import_module('python15_4-5')
+
+LEGACY_PATTERN = re.compile(r'(\d+)-[йя]?\s?(\w+)?\s?(\w+)?')
+
+# Фразы, которые понимают оба разбора, и фразы с ошибками
+PHRASES = [
+    '1-й четверг ноября', '3-я среда мая', '2-я пятница июня', '4-й вторник 12',
+    '2-я 3 6', '1-й понедельник января', '3-я суббота августа', '3-я',
+]
+BAD_PHRASES = ['1-й четверх ноября', '2-я среда маяя', 'четверг ноября']
+
+
+def legacy_parse_phrase(text, now):
+    """
+    Прежний разбор: re.match и поиск в словарях с перехватом KeyError.
+    """
+    text = text.strip()
+    if not text:
+        return None
+    match = LEGACY_PATTERN.match(text)
+    if not match:
+        raise ValueError(f"Неправильный формат строки: {text}")
+    week_num, day_name, month_name = match.groups()
+    try:
+        week_num = int(week_num) if week_num else 1
+        day_num = dates.days_of_week[day_name.lower()] if day_name else now.weekday()
+        month_num = dates.months[month_name.lower()] if month_name else now.month
+    except KeyError as e:
+        raise ValueError(f"Ошибка при разборе строки: {e}") from e
+    return week_num, day_num, month_num
+
+
+def timed(label, parse, phrases, repeat):
+    """
+    Лучшее время из repeat проходов по фразам.
+    """
+    now = datetime.date(2024, 7, 11)
+    best = None
+    errors = 0
+    for _ in range(repeat):
+        errors = 0
+        start = time.perf_counter()
+        for text in phrases:
+            try:
+                parse(text, now)
+            except ValueError:
+                errors += 1
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f'{label:<24} {len(phrases):>9} phrases  {errors:>7} errors  {best:8.3f} s  {len(phrases) / best:12.0f} phrases/s')
+    return best
+
+
+def main():
+    parser = ArgumentParser(description='Date phrase matcher benchmark.')
+    parser.add_argument('--phrases', type=int, default=200000, help='Number of phrases')
+    parser.add_argument('--error_rate', type=float, default=0.1, help='Share of malformed phrases')
+    parser.add_argument('--repeat', type=int, default=3, help='Repetitions (best time is reported)')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    phrases = [
+        rng.choice(BAD_PHRASES if rng.random() < args.error_rate else PHRASES)
+        for _ in range(args.phrases)
+    ]
+    legacy = timed('re.match + KeyError', legacy_parse_phrase, phrases, args.repeat)
+    compiled = timed('word form tables', dates._parse_phrase, phrases, args.repeat)
+    print(f'speedup: {legacy / compiled:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+# Сравнение обхода директории: прежний os.walk со списком, потоковый обход
+# в пуле потоков и обход в пуле процессов - на синтетическом дереве.
+# Запуск: python benchmarks/bench_scan.py --depth 4 --width 6 --files 20
+
+import os
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import python15_6  # noqa: E402
+from python15_6 import FileInfo  # noqa: E402
+
+
+def legacy_get_directory_contents(directory):
+    """
+    Прежняя реализация get_directory_contents (os.walk и общий список).
+    """
+    contents = []
+    for root, dirs, files in os.walk(directory):
+        parent_dir = os.path.basename(root)
+        for name in files:
+            file_name, extension = os.path.splitext(name)
+            contents.append(FileInfo(name=file_name, extension=extension, is_dir=False, parent=parent_dir))
+        for name in dirs:
+            contents.append(FileInfo(name=name, extension='', is_dir=True, parent=parent_dir))
+    return contents
+
+
+def make_tree(root, depth, width, files):
+    """
+    Создание дерева: на каждом уровне width подкаталогов и files файлов в каждом каталоге.
+    """
+    level = [root]
+    for current_depth in range(depth + 1):
+        next_level = []
+        for path in level:
+            for number in range(files):
+                with open(os.path.join(path, f'file{number}.{("txt", "py", "csv")[number % 3]}'), 'w') as file:
+                    file.write('x' * number)
+            if current_depth < depth:
+                for number in range(width):
+                    sub_path = os.path.join(path, f'dir{number}')
+                    os.mkdir(sub_path)
+                    next_level.append(sub_path)
+        level = next_level
+
+
+def timed(label, func, repeat):
+    """
+    Лучшее время из repeat запусков и количество элементов.
+    """
+    best = None
+    count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = sum(1 for _ in func())
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f'{label:<28} {count:>9} entries  {best:8.3f} s  {count / best:12.0f} entries/s')
+    return best
+
+
+def main():
+    parser = ArgumentParser(description='Directory scanner benchmark.')
+    parser.add_argument('--depth', type=int, default=4, help='Tree depth')
+    parser.add_argument('--width', type=int, default=6, help='Subdirectories per directory')
+    parser.add_argument('--files', type=int, default=20, help='Files per directory')
+    parser.add_argument('--roots', type=int, default=2, help='Number of separate roots')
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1, help='Processes for the process pool')
+    parser.add_argument('--repeat', type=int, default=3, help='Repetitions (best time is reported)')
+    parser.add_argument('--directory', type=str, help='Benchmark an existing directory instead of a synthetic tree')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.directory:
+            roots = [args.directory]
+        else:
+            roots = []
+            for number in range(args.roots):
+                root = os.path.join(tmp, f'root{number}')
+                os.mkdir(root)
+                make_tree(root, args.depth, args.width, args.files)
+                roots.append(root)
+
+        def legacy():
+            for root in roots:
+                yield from legacy_get_directory_contents(root)
+
+        timed('os.walk (legacy list)', legacy, args.repeat)
+        timed('scandir + threads', lambda: python15_6.iter_directory_contents(roots), args.repeat)
+        timed('scandir + threads, ordered', lambda: python15_6.iter_directory_contents(roots, ordered=True), args.repeat)
+        timed(f'scandir + {args.processes} processes', lambda: python15_6.iter_directory_contents(roots, processes=args.processes), args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+# Контроль времени запуска CLI: время импорта модуля каждой команды по -X importtime
+# и полное время запуска python main.py <команда> по сравнению с пустым интерпретатором.
+# Если время импорта превышает бюджет (или записанный замер больше чем на --tolerance),
+# скрипт завершается с кодом 1.
+# Запуск: python benchmarks/bench_startup.py --repeat 20 --json startup.json
+#         python benchmarks/bench_startup.py --repeat 20 --compare startup.json
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Команда -> (модуль, аргументы для замера полного запуска, бюджет времени импорта модуля в мс).
+# Бюджеты - примерно вдвое выше медианы на машине разработки: они ловят возврат тяжелого
+# импорта в начало модуля, а не шум измерений. Для точного контроля - --compare с записанным замером
+COMMANDS = {
+    'dates': ('python15_4-5', ['1-й четверг ноября'], 60),
+    'scan': ('python15_6', ['--help'], 70),
+    'student': ('python_add_hw', ['--help'], 60),
+}
+
+
+def child_env(pycache):
+    """
+    Окружение дочерних процессов: байт-код кешируется в отдельном каталоге, как при обычной
+    установке, но без записи __pycache__ в репозиторий (и независимо от PYTHONDONTWRITEBYTECODE).
+    """
+    env = dict(os.environ, PYTHONPYCACHEPREFIX=pycache)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    return env
+
+
+def import_time_ms(module, env):
+    """
+    Время импорта модуля (с зависимостями, не загруженными при старте интерпретатора) по -X importtime.
+    """
+    # __import__, а не importlib.import_module: -X importtime учитывает только импорт через оператор import
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'__import__({module!r})'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True
+    )
+    for line in result.stderr.splitlines():
+        # Строка: "import time: <self, мкс> | <cumulative, мкс> | <имя модуля>"
+        _, _, fields = line.partition('import time:')
+        parts = [part.strip() for part in fields.split('|')]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000
+    raise RuntimeError(f'Модуль {module} не найден в выводе -X importtime')
+
+
+def run_time_ms(argv, cwd, env):
+    """
+    Полное время выполнения команды интерпретатора в мс.
+    """
+    start = time.perf_counter()
+    subprocess.run([sys.executable, *argv], cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = ArgumentParser(description='CLI startup time budget check.')
+    parser.add_argument('--repeat', type=int, default=10, help='Runs per measurement (median is reported)')
+    parser.add_argument('--json', type=str, metavar='FILE', help='Write import times as JSON')
+    parser.add_argument('--compare', type=str, metavar='FILE', help='Check import times against a JSON written by --json')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed slowdown vs --compare as a fraction (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    recorded = {}
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            recorded = json.load(file)['import_ms']
+
+    failed = []
+    results = {}
+    # Запуски выполняются во временном каталоге, чтобы файлы логов команд не попадали в репозиторий
+    with tempfile.TemporaryDirectory() as tmp:
+        env = child_env(os.path.join(tmp, 'pycache'))
+        baseline = statistics.median(run_time_ms(['-c', 'pass'], tmp, env) for _ in range(args.repeat))
+        print(f'{"python -c pass":<24} {"":>16} run {baseline:7.1f} ms')
+        for command, (module, command_args, budget) in COMMANDS.items():
+            # Первый импорт компилирует и кеширует байт-код и в замер не входит
+            import_time_ms(module, env)
+            imported = statistics.median(import_time_ms(module, env) for _ in range(args.repeat))
+            run = statistics.median(
+                run_time_ms([os.path.join(ROOT, 'main.py'), command, *command_args], tmp, env) for _ in range(args.repeat)
+            )
+            results[command] = imported
+            # С записанным замером бюджет - он сам плюс допуск, иначе - фиксированный бюджет команды
+            if command in recorded:
+                budget = recorded[command] * (1 + args.tolerance)
+            status = 'ok' if imported <= budget else 'OVER BUDGET'
+            print(f'{"main.py " + command:<24} import {imported:6.1f} ms  run {run:7.1f} ms  '
+                  f'(+{run - baseline:.1f} ms)  budget {budget:.1f} ms  {status}')
+            if imported > budget:
+                failed.append(command)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump({'python': sys.version.split()[0], 'repeat': args.repeat, 'import_ms': results}, file, indent=2)
+    if failed:
+        print(f'Import time over budget: {", ".join(failed)}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
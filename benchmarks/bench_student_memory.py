@@ -0,0 +1,121 @@
+# Сравнение памяти, занимаемой данными студентов: словари списков (прежнее
+# представление) и компактное представление SubjectRecord на массивах.
+# Запуск: python benchmarks/bench_student_memory.py --students 10000
+
+import os
+import random
+import sys
+import tracemalloc
+from argparse import ArgumentParser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gradebook import RunningStats  # noqa: E402
+from python_add_hw import Student  # noqa: E402
+
+SUBJECTS = ['Математика', 'Физика', 'История', 'Литература']
+LETTERS = 'абвгдежзиклмнопрстуфхцчшэюя'
+
+
+def make_name(number):
+    """
+    Генерация допустимого ФИО по номеру студента.
+    """
+    suffix = ''
+    while True:
+        number, rest = divmod(number, len(LETTERS))
+        suffix += LETTERS[rest]
+        if not number:
+            break
+    return f"Студент {suffix.capitalize()}"
+
+
+class LegacyStudent:
+    """
+    Прежнее представление Student: атрибуты в __dict__, предметы - словари со списками int,
+    статистика - отдельные словари RunningStats по предметам.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.subjects = {}
+        self.subjects_file = None
+        self.grade_stats = {}
+        self.test_score_stats = {}
+        self.all_grades_stats = RunningStats()
+
+    def add(self, subject, grade, test_score):
+        if subject not in self.subjects:
+            self.subjects[subject] = {'grades': [], 'test_scores': []}
+            self.grade_stats[subject] = RunningStats()
+            self.test_score_stats[subject] = RunningStats()
+        self.subjects[subject]['grades'].append(grade)
+        self.grade_stats[subject].add(grade)
+        self.all_grades_stats.add(grade)
+        self.subjects[subject]['test_scores'].append(test_score)
+        self.test_score_stats[subject].add(test_score)
+
+
+def legacy_students(rows):
+    """
+    Прежнее представление (см. LegacyStudent).
+    """
+    students = {}
+    for name, subject, grade, test_score in rows:
+        student = students.get(name)
+        if student is None:
+            student = students[name] = LegacyStudent(name)
+        student.add(subject, grade, test_score)
+    return students
+
+
+def compact_students(rows):
+    """
+    Текущее представление: Student с __slots__ и SubjectRecord на массивах.
+    """
+    students = {}
+    for name, subject, grade, test_score in rows:
+        student = students.get(name)
+        if student is None:
+            student = students[name] = Student(name)
+        student._add_to_subject(subject, grade, test_score)
+    return students
+
+
+def measure(build, rows):
+    """
+    Объем памяти (байт), занятой построенной структурой.
+    """
+    tracemalloc.start()
+    result = build(rows)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main():
+    parser = ArgumentParser(description='Memory benchmark for Student subject data.')
+    parser.add_argument('--students', type=int, default=10000, help='Number of students')
+    parser.add_argument('--grades', type=int, default=20, help='Grades per student and subject')
+    args = parser.parse_args()
+
+    rng = random.Random(15)
+    rows = [
+        (make_name(number), subject, rng.randint(2, 5), rng.randint(0, 100))
+        for number in range(args.students)
+        for subject in SUBJECTS
+        for _ in range(args.grades)
+    ]
+
+    legacy = measure(legacy_students, rows)
+    compact = measure(compact_students, rows)
+    values = len(rows) * 2
+    print(f"values: {values}")
+    print(f"legacy dict/list: {legacy / 2 ** 20:.1f} MiB ({legacy / values:.1f} B/value)")
+    print(f"compact slots/array: {compact / 2 ** 20:.1f} MiB ({compact / values:.1f} B/value)")
+    print(f"reduction: {legacy / compact:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+# Набор бенчмарков для всех трех утилит на синтетических данных: журнал оценок
+# (загрузка Student), дерево каталогов (get_directory_contents) и тексты дат (parse_date).
+# Для каждой нагрузки выводятся пропускная способность, задержки p50/p99 и пиковый RSS;
+# каждая нагрузка выполняется в отдельном процессе, чтобы пиковый RSS не смешивался.
+# Запуск: python benchmarks/run.py --json results.json
+#         python benchmarks/run.py dates --phrases 5000000 --compare results.json
+#         python benchmarks/run.py student --profile cprofile
+
+import csv
+import datetime
+import importlib
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from array import array
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+from bench_scan import make_tree  # noqa: E402
+from bench_student_memory import SUBJECTS, make_name  # noqa: E402
+
+WORKLOADS = ('student', 'scan', 'dates')
+PROFILE_MODES = ('cprofile', 'tracemalloc')
+
+# Фразы для нагрузки dates (все разбираются без ошибок, чтобы не мерить запись в лог)
+PHRASES = [
+    '1-й четверг ноября', '3-я среда мая', '2-я пятница июня', '4-й вторник 12', '2-я 3 6',
+    'последняя пятница в ноябре', '2nd monday of march', '1-й понедельник января', '3-я',
+]
+
+
+def student_workload(args, tmp):
+    """
+    Журнал из args.students студентов; операция - загрузка студента и его средний балл.
+    """
+    from gradebook import FIELDNAMES
+    from python_add_hw import Student
+
+    path = os.path.join(tmp, 'subjects.csv')
+    rng = random.Random(15)
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(FIELDNAMES)
+        for number in range(args.students):
+            name = make_name(number)
+            for subject in SUBJECTS:
+                for _ in range(args.grades):
+                    writer.writerow([name, subject, rng.randint(2, 5), rng.randint(0, 100)])
+    names = [make_name(rng.randrange(args.students)) for _ in range(args.lookups)]
+
+    def load(name):
+        Student(name, path).get_average_grade()
+
+    return load, names, 'students'
+
+
+def scan_workload(args, tmp):
+    """
+    Дерево каталогов depth x width x files; операция - полный обход get_directory_contents.
+    """
+    import python15_6
+
+    make_tree(tmp, args.depth, args.width, args.files)
+    entries = len(python15_6.get_directory_contents(tmp))
+
+    def scan(_):
+        python15_6.get_directory_contents(tmp)
+
+    return scan, range(args.scans), f'scans ({entries} entries each)'
+
+
+def dates_workload(args, tmp):
+    """
+    args.phrases текстов дат; операция - parse_date одного текста.
+    """
+    dates = importlib.import_module('python15_4-5')
+    today = datetime.date(2024, 7, 11)
+    rng = random.Random(4)
+    phrases = [rng.choice(PHRASES) for _ in range(args.phrases)]
+
+    def parse(text):
+        dates.parse_date(text, today)
+
+    return parse, phrases, 'phrases'
+
+
+def percentile(sorted_values, p):
+    """
+    Перцентиль отсортированной последовательности (ближайший ранг).
+    """
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))]
+
+
+def measure(operation, items):
+    """
+    Выполнение операции для каждого элемента с замером задержки каждого вызова.
+
+    Returns:
+        dict: Количество операций, общее время, пропускная способность и задержки p50/p99 (мкс).
+    """
+    latencies = array('q')
+    clock = time.perf_counter_ns
+    start = clock()
+    for item in items:
+        began = clock()
+        operation(item)
+        latencies.append(clock() - began)
+    elapsed = (clock() - start) / 1e9
+    ordered = sorted(latencies)
+    return {
+        'ops': len(latencies),
+        'seconds': round(elapsed, 4),
+        'ops_per_second': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'p50_us': round(percentile(ordered, 50) / 1000, 2),
+        'p99_us': round(percentile(ordered, 99) / 1000, 2),
+    }
+
+
+def run_workload(name, args):
+    """
+    Подготовка и выполнение одной нагрузки в текущем процессе (с профилированием, если задано).
+
+    Returns:
+        dict: Результаты замера.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        # Журналы логирования утилит пишутся во временный каталог, а не в рабочий
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            operation, items, unit = globals()[f'{name}_workload'](args, tmp)
+            if args.profile == 'cprofile':
+                import cProfile
+                import pstats
+
+                profiler = cProfile.Profile()
+                result = profiler.runcall(measure, operation, items)
+                pstats.Stats(profiler, stream=sys.stderr).sort_stats('cumulative').print_stats(args.top)
+            elif args.profile == 'tracemalloc':
+                import tracemalloc
+
+                tracemalloc.start()
+                result = measure(operation, items)
+                snapshot = tracemalloc.take_snapshot()
+                result['traced_peak_mib'] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 2)
+                tracemalloc.stop()
+                for stat in snapshot.statistics('lineno')[:args.top]:
+                    print(stat, file=sys.stderr)
+            else:
+                result = measure(operation, items)
+        finally:
+            os.chdir(cwd)
+    # ru_maxrss в Linux - в килобайтах, в macOS - в байтах
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result['peak_rss_mib'] = round(max_rss / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10), 1)
+    return {'workload': name, 'unit': unit, **result}
+
+
+def run_in_child(name, argv):
+    """
+    Выполнение нагрузки в отдельном процессе интерпретатора.
+
+    Returns:
+        dict: Результаты замера из дочернего процесса.
+    """
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), name, '--child', *argv],
+        stdout=subprocess.PIPE, check=True, text=True
+    ).stdout
+    return json.loads(output)
+
+
+def print_result(result, baseline=None):
+    """
+    Строка отчета; при наличии прежнего результата - отношение пропускной способности.
+    """
+    line = (f"{result['workload']:<8} {result['ops']:>9} {result['unit']:<28} {result['seconds']:9.3f} s "
+            f"{result['ops_per_second']:>12.1f} ops/s  p50 {result['p50_us']:>10.2f} us  "
+            f"p99 {result['p99_us']:>10.2f} us  RSS {result['peak_rss_mib']:>7.1f} MiB")
+    if baseline and baseline.get('ops_per_second'):
+        line += f"  {result['ops_per_second'] / baseline['ops_per_second']:.2f}x vs baseline"
+    print(line)
+
+
+def main():
+    parser = ArgumentParser(description='Benchmark suite for the gradebook, directory scanner and date parser.')
+    parser.add_argument('workloads', nargs='*', metavar='WORKLOAD',
+                        help=f'Workloads to run: {", ".join(WORKLOADS)} (default: all)')
+    parser.add_argument('--students', type=int, default=10000, help='Students in the synthetic gradebook')
+    parser.add_argument('--grades', type=int, default=5, help='Grades per student and subject')
+    parser.add_argument('--lookups', type=int, default=2000, help='Student loads to time')
+    parser.add_argument('--depth', type=int, default=4, help='Directory tree depth')
+    parser.add_argument('--width', type=int, default=6, help='Subdirectories per directory')
+    parser.add_argument('--files', type=int, default=20, help='Files per directory')
+    parser.add_argument('--scans', type=int, default=5, help='Full directory scans to time')
+    parser.add_argument('--phrases', type=int, default=1000000, help='Date phrases to parse')
+    parser.add_argument('--profile', choices=PROFILE_MODES, help='Profile workloads with cProfile or tracemalloc (report on stderr)')
+    parser.add_argument('--top', type=int, default=20, help='Lines in the profile report')
+    parser.add_argument('--json', type=str, metavar='FILE', help='Write results as JSON')
+    parser.add_argument('--compare', type=str, metavar='FILE', help='Compare throughput with a previous JSON run')
+    parser.add_argument('--child', action='store_true', help='Run a single workload in this process and print JSON (internal)')
+    args = parser.parse_args()
+    unknown = set(args.workloads) - set(WORKLOADS)
+    if unknown:
+        parser.error(f'unknown workloads: {", ".join(sorted(unknown))}')
+    workloads = args.workloads or list(WORKLOADS)
+
+    if args.child:
+        print(json.dumps(run_workload(workloads[0], args)))
+        return
+
+    # Параметры нагрузки передаются дочерним процессам без самих имен нагрузок и файлов отчетов
+    argv = [
+        arg for name, value in vars(args).items()
+        if value is not None and name not in ('workloads', 'json', 'compare', 'child')
+        for arg in (f'--{name}', str(value))
+    ]
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            baseline = {result['workload']: result for result in json.load(file)['results']}
+
+    results = []
+    for name in workloads:
+        result = run_in_child(name, argv)
+        print_result(result, baseline.get(name))
+        results.append(result)
+
+    if args.json:
+        report = {
+            'created': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'parameters': {name: value for name, value in vars(args).items() if name not in ('workloads', 'json', 'compare', 'child')},
+            'results': results,
+        }
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,810 @@
+import csv
+import io
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: рекомендательные блокировки fcntl недоступны
+    fcntl = None
+
+# Заголовок файла с оценками (subjects.csv)
+FIELDNAMES = ['Студент', 'Предмет', 'Оценка', 'Результат теста']
+
+# Допустимые значения оценки и результата теста; записи с другими значениями считаются поврежденными
+GRADE_RANGE = range(2, 6)
+TEST_SCORE_RANGE = range(0, 101)
+
+# Индекс хранится рядом с CSV: subjects.csv -> subjects.csv.idx
+INDEX_SUFFIX = '.idx'
+INDEX_VERSION = 1
+
+# Журнал новых записей: subjects.csv -> subjects.csv.journal
+JOURNAL_SUFFIX = '.journal'
+# После скольких записей в журнале он сливается в основной CSV
+COMPACT_THRESHOLD = 1000
+# Маркер границы пакета записей в журнале: им начинается журнал и заканчивается каждый пакет.
+# Строка из одного поля, поэтому при чтении журнала она пропускается как неполная запись
+BATCH_END = b'#batch-end\n'
+
+# Файл блокировки и служебные файлы слияния журнала
+LOCK_SUFFIX = '.lock'
+MERGING_SUFFIX = '.merging'
+COMMIT_SUFFIX = '.commit'
+
+# Бинарный снимок CSV (см. gradebook_snapshot): subjects.csv -> subjects.csv.snap
+SNAPSHOT_SUFFIX = '.snap'
+
+
+def _parse_int(value):
+    """
+    Преобразование поля CSV в целое число.
+
+    Args:
+        value (str): Значение поля.
+
+    Returns:
+        int | None: Число или None, если поле пустое.
+    """
+    value = (value or '').strip()
+    return int(value) if value else None
+
+
+def _parse_line(line):
+    """
+    Разбор одной строки CSV, прочитанной в бинарном режиме.
+
+    Args:
+        line (bytes): Строка файла.
+
+    Returns:
+        list: Список полей строки.
+    """
+    return next(csv.reader([line.decode('utf-8-sig')]), [])
+
+
+def _parse_record(values, source):
+    """
+    Преобразование полей (предмет, оценка, результат теста) записи.
+
+    Это единственное место, где проверяются значения из файлов, поэтому снимок,
+    колонки аналитики и Student видят одни и те же записи.
+
+    Args:
+        values (iterable): Поля записи.
+        source (str): Описание источника для сообщения об ошибке.
+
+    Returns:
+        tuple | None: (предмет, оценка, результат теста) или None, если запись повреждена
+        (не число или значение вне GRADE_RANGE / TEST_SCORE_RANGE).
+    """
+    subject, grade, test_score = values
+    try:
+        parsed_grade, parsed_score = _parse_int(grade), _parse_int(test_score)
+        valid = ((parsed_grade is None or parsed_grade in GRADE_RANGE)
+                 and (parsed_score is None or parsed_score in TEST_SCORE_RANGE))
+    except ValueError:
+        valid = False
+    if not valid:
+        logging.warning(f"Пропущена поврежденная запись в {source}: {subject}, {grade}, {test_score}")
+        return None
+    return subject, parsed_grade, parsed_score
+
+
+def _file_id(path):
+    """
+    Идентификатор состояния файла (inode, размер, время модификации) или None, если файла нет.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_ino, stat.st_size, stat.st_mtime_ns]
+
+
+def _has_open_batch(path):
+    """
+    Проверка, что журнал не заканчивается на границе пакета: последний пакет записан
+    без маркера BATCH_END (сбой во время записи). В журнале без маркера в начале
+    (записанном до появления маркеров) проверяется только обрыв последней строки.
+    """
+    try:
+        with open(path, 'rb') as file:
+            head = file.read(len(BATCH_END))
+            if not head:
+                return False
+            file.seek(0, os.SEEK_END)
+            file.seek(max(0, file.tell() - len(BATCH_END) - 1))
+            tail = file.read()
+    except FileNotFoundError:
+        return False
+    if head != BATCH_END:
+        return not tail.endswith(b'\n')
+    return tail != BATCH_END and not tail.endswith(b'\n' + BATCH_END)
+
+
+def _repair_journal(path):
+    """
+    Отрезание недописанного последнего пакета журнала целиком (вместе с полными строками
+    пакета), чтобы пакет записей после сбоя не оказался в журнале частично.
+    """
+    if not _has_open_batch(path):
+        return
+    with open(path, 'r+b') as file:
+        data = file.read()
+        if data.startswith(BATCH_END):
+            end = data.rfind(b'\n' + BATCH_END)
+            size = end + 1 + len(BATCH_END) if end >= 0 else len(BATCH_END)
+        else:
+            size = data.rfind(b'\n') + 1
+        file.truncate(size)
+        file.flush()
+        os.fsync(file.fileno())
+    logging.warning(f"Отрезан недописанный пакет в конце журнала {path} ({len(data) - size} байт)")
+
+
+def _fsync_dir(path):
+    """
+    Сброс на диск каталога, содержащего файл (чтобы переименование пережило сбой питания).
+    """
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class RunningStats:
+    """
+    Накопленная статистика последовательности чисел (алгоритм Уэлфорда).
+
+    Attributes:
+        count (int): Количество значений.
+        total (int): Сумма значений.
+        minimum (int | None): Минимальное значение.
+        maximum (int | None): Максимальное значение.
+    """
+    __slots__ = ('count', 'total', 'minimum', 'maximum', '_mean', '_m2')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.minimum = None
+        self.maximum = None
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value):
+        """
+        Учет нового значения за O(1).
+
+        Args:
+            value (int): Значение.
+        """
+        self.count += 1
+        self.total += value
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+        delta = value - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (value - self._mean)
+
+    @property
+    def mean(self):
+        """
+        float: Среднее значение (0.0, если значений нет).
+        """
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def variance(self):
+        """
+        float: Дисперсия генеральной совокупности (0.0, если значений нет).
+        """
+        return self._m2 / self.count if self.count else 0.0
+
+    def __repr__(self):
+        return f"RunningStats(count={self.count}, mean={self.mean}, min={self.minimum}, max={self.maximum}, variance={self.variance})"
+
+
+class Gradebook:
+    """
+    Хранилище оценок поверх CSV файла с индексом по студентам.
+
+    Индекс «имя студента -> смещения строк в файле» строится один раз и сохраняется
+    рядом с CSV. При изменении размера или времени модификации CSV индекс перестраивается.
+    Загрузка студента читает только его строки, а не весь файл.
+
+    Новые записи дописываются по одной строке в журнал, который после
+    compact_threshold записей сливается в основной CSV (см. compact).
+
+    Для чтения основной CSV используется через бинарный колоночный снимок
+    (см. GradebookSnapshot), который открывается через mmap без разбора текста и
+    перестраивается автоматически, когда CSV изменился. CSV остается форматом обмена.
+
+    Несколько процессов могут работать с одним файлом: чтение выполняется под
+    разделяемой блокировкой fcntl, запись - под исключительной. Запись в журнал
+    сбрасывается на диск (fsync), а основной CSV заменяется только атомарным
+    переименованием. Недописанные после сбоя строки журнала и прерванное слияние
+    восстанавливаются при следующем обращении; основной CSV при чтении не изменяется.
+
+    Attributes:
+        subjects_file (str): Путь к CSV файлу с оценками.
+        index_file (str): Путь к файлу индекса.
+        journal_file (str): Путь к журналу новых записей.
+        lock_file (str): Путь к файлу блокировки.
+        snapshot_file (str): Путь к бинарному снимку основного CSV.
+        compact_threshold (int): Размер журнала, после которого выполняется слияние.
+        use_snapshot (bool): Читать основной CSV через снимок, а не через индекс строк.
+    """
+    _instances = {}
+
+    def __init__(self, subjects_file, compact_threshold=COMPACT_THRESHOLD, use_snapshot=True):
+        """
+        Инициализация хранилища.
+
+        Args:
+            subjects_file (str): Путь к CSV файлу с оценками.
+            compact_threshold (int, optional): Размер журнала, после которого выполняется слияние.
+            use_snapshot (bool, optional): Читать основной CSV через бинарный снимок.
+        """
+        self.subjects_file = subjects_file
+        self.index_file = subjects_file + INDEX_SUFFIX
+        self.journal_file = subjects_file + JOURNAL_SUFFIX
+        self.lock_file = subjects_file + LOCK_SUFFIX
+        self.merging_file = self.journal_file + MERGING_SUFFIX
+        self.commit_file = subjects_file + COMMIT_SUFFIX
+        self.snapshot_file = subjects_file + SNAPSHOT_SUFFIX
+        self.compact_threshold = compact_threshold
+        self.use_snapshot = use_snapshot
+        self._snapshot = None
+        self._snapshot_failed = None
+        self._columns = None
+        self._offsets = {}
+        self._stamp = None
+        self._journal = {}
+        self._journal_size = 0
+        self._journal_stamp = None
+        self._local = threading.local()
+
+    @classmethod
+    def open(cls, subjects_file):
+        """
+        Получение хранилища для файла с переиспользованием уже открытого в процессе.
+
+        Args:
+            subjects_file (str): Путь к CSV файлу с оценками.
+
+        Returns:
+            Gradebook: Хранилище для указанного файла.
+        """
+        key = os.path.abspath(subjects_file)
+        gradebook = cls._instances.get(key)
+        if gradebook is None:
+            gradebook = cls._instances[key] = cls(subjects_file)
+        return gradebook
+
+    @contextmanager
+    def _locked(self, exclusive=False):
+        """
+        Рекомендательная блокировка файла журнала оценок (fcntl.flock).
+
+        Повторный вход в том же потоке не берет блокировку заново, поэтому
+        операции записи могут вызывать операции чтения. Повышение разделяемой
+        блокировки до исключительной не поддерживается: например, запись из цикла
+        по не дочитанному read_student или iter_rows.
+
+        Если файл блокировки нельзя ни открыть, ни создать (каталог без права записи),
+        чтение выполняется без блокировки с предупреждением в логе; запись - нет.
+
+        Args:
+            exclusive (bool): Исключительная блокировка (для записи) вместо разделяемой.
+
+        Raises:
+            RuntimeError: Если поток удерживает разделяемую блокировку и запрашивает исключительную.
+            OSError: Если для исключительной блокировки не удалось открыть файл блокировки.
+        """
+        depth = getattr(self._local, 'depth', 0)
+        if depth:
+            if exclusive and not self._local.exclusive:
+                raise RuntimeError(
+                    f"Запись в {self.subjects_file} во время незавершенного чтения в том же потоке: "
+                    "повышение разделяемой блокировки до исключительной не поддерживается"
+                )
+            self._local.depth = depth + 1
+            try:
+                yield
+            finally:
+                self._local.depth = depth
+            return
+        self._local.exclusive = exclusive
+        lock_file = None
+        if fcntl is not None:
+            try:
+                lock_file = self._open_lock_file(exclusive)
+            except OSError as e:
+                if exclusive:
+                    raise
+                logging.warning(f"Чтение {self.subjects_file} без блокировки: не удалось открыть {self.lock_file}: {e}")
+        if lock_file is None:
+            self._local.depth = 1
+            try:
+                yield
+            finally:
+                self._local.depth = 0
+            return
+        with lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            self._local.depth = 1
+            try:
+                yield
+            finally:
+                self._local.depth = 0
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _open_lock_file(self, exclusive):
+        """
+        Открытие файла блокировки.
+
+        Для разделяемой блокировки существующий файл открывается только для чтения
+        (flock не требует права записи), поэтому хранилище можно читать из каталога
+        или с файлом блокировки, недоступными для записи.
+
+        Raises:
+            OSError: Если файл не удалось открыть или создать.
+        """
+        if not exclusive:
+            try:
+                return open(self.lock_file, 'r')
+            except FileNotFoundError:
+                pass
+        return open(self.lock_file, 'a')
+
+    def _recover(self):
+        """
+        Восстановление после сбоя: завершение прерванного слияния и отрезание недописанного пакета журнала.
+
+        Основной CSV не восстанавливается: он заменяется только атомарным переименованием и
+        не может быть оборван нашей записью, а файл без перевода строки в конце (например,
+        написанный вручную) - корректный CSV, последнюю строку которого нельзя терять.
+        """
+        if not (os.path.exists(self.merging_file) or os.path.exists(self.commit_file)
+                or _has_open_batch(self.journal_file)):
+            return
+        with self._locked(exclusive=True):
+            _repair_journal(self.journal_file)
+            if os.path.exists(self.merging_file):
+                logging.warning(f"Завершение прерванного слияния журнала в файл {self.subjects_file}")
+                _repair_journal(self.merging_file)
+                self._finish_compaction()
+            elif os.path.exists(self.commit_file):
+                os.remove(self.commit_file)
+
+    def _file_stamp(self):
+        """
+        Отметка состояния CSV файла (размер и время модификации).
+
+        Raises:
+            FileNotFoundError: Если файл не существует.
+        """
+        stat = os.stat(self.subjects_file)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def _ensure_index(self):
+        """
+        Проверка актуальности индекса; при необходимости загрузка с диска или перестроение.
+        """
+        stamp = self._file_stamp()
+        if self._stamp == stamp:
+            return
+        if not self._load_index(stamp):
+            self._build_index(stamp)
+            self._save_index()
+
+    def _load_index(self, stamp):
+        """
+        Загрузка сохраненного индекса, если он соответствует текущему состоянию CSV.
+
+        Returns:
+            bool: True, если индекс загружен.
+        """
+        try:
+            with open(self.index_file, encoding='utf-8') as index_file:
+                data = json.load(index_file)
+        except (OSError, ValueError):
+            return False
+        if data.get('version') != INDEX_VERSION or data.get('stamp') != stamp:
+            return False
+        self._columns = data['columns']
+        self._offsets = data['offsets']
+        self._stamp = stamp
+        logging.info(f"Загружен индекс {self.index_file}")
+        return True
+
+    def _build_index(self, stamp):
+        """
+        Построение индекса за один проход по CSV файлу.
+        """
+        columns = None
+        offsets = {}
+        with open(self.subjects_file, 'rb') as csvfile:
+            header = csvfile.readline()
+            if header.strip():
+                columns = _parse_line(header)
+            name_pos = columns.index('Студент') if columns else 0
+            offset = len(header)
+            for line in csvfile:
+                if line.strip():
+                    row = _parse_line(line)
+                    if len(row) > name_pos:
+                        offsets.setdefault(row[name_pos], []).append(offset)
+                offset += len(line)
+        self._columns = columns
+        self._offsets = offsets
+        self._stamp = stamp
+        logging.info(f"Построен индекс для файла {self.subjects_file}: студентов {len(offsets)}")
+
+    def _save_index(self):
+        """
+        Сохранение индекса на диск (через временный файл, чтобы не оставить его недописанным).
+        """
+        data = {'version': INDEX_VERSION, 'stamp': self._stamp, 'columns': self._columns, 'offsets': self._offsets}
+        # Индекс могут сохранять одновременно несколько читателей, поэтому временный файл у каждого свой
+        tmp_file = f"{self.index_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as index_file:
+                json.dump(data, index_file, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_file, self.index_file)
+        except OSError as e:
+            logging.warning(f"Не удалось сохранить индекс {self.index_file}: {e}")
+        finally:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
+    def _iter_journal_values(self, path):
+        """
+        Последовательное чтение полей записей журнала без разбора значений.
+
+        Yields:
+            list: Строковые поля [имя, предмет, оценка, результат теста].
+        """
+        try:
+            with open(path, newline='', encoding='utf-8') as journal_file:
+                for row in csv.reader(journal_file):
+                    if len(row) == len(FIELDNAMES):
+                        yield row
+        except FileNotFoundError:
+            pass
+
+    def _read_journal(self, path):
+        """
+        Чтение журнала (или журнала, находящегося в слиянии).
+
+        Returns:
+            tuple: (словарь имя -> список записей, количество записей).
+        """
+        journal = {}
+        size = 0
+        for name, *values in self._iter_journal_values(path):
+            record = _parse_record(values, path)
+            if record is not None:
+                journal.setdefault(name, []).append(record)
+                size += 1
+        return journal, size
+
+    def _ensure_journal(self):
+        """
+        Перечитывание журнала, если он изменился с прошлого чтения.
+        """
+        stamp = _file_id(self.journal_file)
+        if stamp is None:
+            self._journal, self._journal_size, self._journal_stamp = {}, 0, None
+            return
+        if self._journal_stamp == stamp:
+            return
+        self._journal, self._journal_size = self._read_journal(self.journal_file)
+        self._journal_stamp = stamp
+
+    def _iter_csv_values(self):
+        """
+        Последовательное чтение полей записей основного CSV файла без разбора значений.
+
+        Yields:
+            list: Строковые поля [имя, предмет, оценка, результат теста] в порядке FIELDNAMES.
+        """
+        with open(self.subjects_file, newline='', encoding='utf-8-sig') as csvfile:
+            reader = csv.reader(csvfile)
+            columns = next(reader, None)
+            if not columns:
+                return
+            positions = [columns.index(field) for field in FIELDNAMES]
+            for row in reader:
+                if row:
+                    yield [row[pos] if pos < len(row) else '' for pos in positions]
+
+    def _iter_csv_rows(self):
+        """
+        Последовательное чтение записей основного CSV файла (поврежденные записи пропускаются).
+
+        Yields:
+            tuple: (имя, предмет, оценка, результат теста).
+        """
+        for name, *values in self._iter_csv_values():
+            record = _parse_record(values, self.subjects_file)
+            if record is not None:
+                yield (name, *record)
+
+    def _ensure_snapshot(self):
+        """
+        Проверка актуальности снимка; при необходимости открытие с диска или перестроение из CSV.
+
+        Returns:
+            GradebookSnapshot | None: Снимок или None, если значения CSV не помещаются в колонки снимка
+            или снимок не удалось сохранить (например, каталог недоступен для записи); тогда
+            чтение идет через CSV и индекс.
+        """
+        stamp = self._file_stamp()
+        if self._snapshot is not None and self._snapshot.stamp == stamp:
+            return self._snapshot
+        if self._snapshot_failed == stamp:
+            return None
+        # Модуль снимка (mmap, struct) импортируется только при чтении через снимок: запуск CLI за него не платит
+        from gradebook_snapshot import GradebookSnapshot
+
+        # Прежний снимок не закрывается явно: его колонки могут еще использоваться (см. CohortAnalytics)
+        self._snapshot = GradebookSnapshot.load(self.snapshot_file, stamp)
+        if self._snapshot is None:
+            try:
+                GradebookSnapshot.write(self.snapshot_file, stamp, self._iter_csv_rows())
+            except (OverflowError, OSError) as e:
+                logging.warning(f"Снимок для файла {self.subjects_file} не построен: {e}")
+                # Не перестраиваем снимок при каждом чтении, пока CSV не изменится
+                self._snapshot, self._snapshot_failed = None, stamp
+                return None
+            self._snapshot = GradebookSnapshot.load(self.snapshot_file, stamp)
+        return self._snapshot
+
+    def snapshot(self):
+        """
+        Актуальный бинарный снимок основного CSV (строится или перестраивается, если нужно).
+
+        Returns:
+            GradebookSnapshot | None: Снимок или None, если значения CSV не помещаются в колонки снимка.
+        """
+        return self.read_snapshot()[0]
+
+    def read_snapshot(self):
+        """
+        Снимок основного CSV и записи журнала, прочитанные под одной блокировкой.
+
+        Returns:
+            tuple: (GradebookSnapshot или None, список записей журнала (имя, предмет, оценка, результат теста)).
+        """
+        self._recover()
+        with self._locked():
+            self._ensure_journal()
+            journal_rows = [
+                (name, subject, grade, test_score)
+                for name, records in self._journal.items()
+                for subject, grade, test_score in records
+            ]
+            return self._ensure_snapshot(), journal_rows
+
+    def students(self):
+        """
+        Список студентов, встречающихся в файле и журнале.
+
+        Returns:
+            list: Имена студентов.
+        """
+        self._recover()
+        with self._locked():
+            self._ensure_journal()
+            snapshot = self._ensure_snapshot() if self.use_snapshot else None
+            if snapshot is not None:
+                return list(dict.fromkeys([*snapshot.names, *self._journal]))
+            self._ensure_index()
+            return list(dict.fromkeys([*self._offsets, *self._journal]))
+
+    def read_student(self, name):
+        """
+        Чтение строк указанного студента.
+
+        Args:
+            name (str): Имя студента.
+
+        Yields:
+            tuple: (предмет, оценка, результат теста); отсутствующие значения равны None.
+        """
+        self._recover()
+        with self._locked():
+            self._ensure_journal()
+            snapshot = self._ensure_snapshot() if self.use_snapshot else None
+            if snapshot is not None:
+                yield from snapshot.read_student(name)
+                yield from self._journal.get(name, ())
+                return
+            self._ensure_index()
+            offsets = self._offsets.get(name)
+            if offsets:
+                positions = [self._columns.index(field) for field in FIELDNAMES[1:]]
+                with open(self.subjects_file, 'rb') as csvfile:
+                    for offset in offsets:
+                        csvfile.seek(offset)
+                        row = _parse_line(csvfile.readline())
+                        record = _parse_record((row[pos] if pos < len(row) else '' for pos in positions), self.subjects_file)
+                        if record is not None:
+                            yield record
+            yield from self._journal.get(name, ())
+
+    def iter_rows(self):
+        """
+        Последовательное чтение всех записей файла и журнала за один проход.
+        При чтении через снимок записи основного файла сгруппированы по студентам.
+
+        Yields:
+            tuple: (имя, предмет, оценка, результат теста); отсутствующие значения равны None.
+        """
+        self._recover()
+        with self._locked():
+            self._ensure_journal()
+            snapshot = self._ensure_snapshot() if self.use_snapshot else None
+            yield from snapshot.iter_rows() if snapshot is not None else self._iter_csv_rows()
+            for name, records in self._journal.items():
+                for subject, grade, test_score in records:
+                    yield name, subject, grade, test_score
+
+    def state(self):
+        """
+        Отметка состояния основного CSV и журнала: меняется при любой записи,
+        в том числе сделанной другим процессом.
+
+        Returns:
+            tuple: Идентификаторы (inode, размер, время модификации) CSV и журнала; None для отсутствующих файлов.
+        """
+        return _file_id(self.subjects_file), _file_id(self.journal_file)
+
+    def append(self, name, subject, grade=None, test_score=None):
+        """
+        Добавление одной записи в журнал.
+
+        Args:
+            name (str): Имя студента.
+            subject (str): Название предмета.
+            grade (int, optional): Оценка.
+            test_score (int, optional): Результат теста.
+        """
+        self.append_many([(name, subject, grade, test_score)])
+
+    def append_many(self, records):
+        """
+        Дописывание записей в журнал одной операцией записи.
+
+        Пишутся только новые записи, поэтому время записи не зависит от истории студента.
+        Запись выполняется под исключительной блокировкой и сбрасывается на диск до возврата.
+        Пакет заканчивается маркером BATCH_END: пакет, прерванный сбоем, восстановление
+        отрезает целиком, поэтому записи пакета попадают в журнал все или ни одной.
+        Если журнал превысил compact_threshold, он сливается в основной CSV.
+
+        Args:
+            records (iterable): Кортежи (имя, предмет, оценка, результат теста); None - пустое поле.
+
+        Returns:
+            tuple: Состояние хранилища (см. state) непосредственно до и после записи,
+            снятое под той же блокировкой: по нему видно, писал ли кто-то еще между записями.
+        """
+        buffer = io.StringIO(newline='')
+        writer = csv.writer(buffer)
+        count = 0
+        for name, subject, grade, test_score in records:
+            writer.writerow([name, subject, '' if grade is None else grade, '' if test_score is None else test_score])
+            count += 1
+        data = buffer.getvalue().encode('utf-8')
+
+        self._recover()
+        with self._locked(exclusive=True):
+            before = self.state()
+            if not os.path.exists(self.subjects_file) or os.path.getsize(self.subjects_file) == 0:
+                # Основной файл создается с заголовком, чтобы его можно было читать csv.DictReader
+                self._replace_csv({})
+                os.remove(self.commit_file)
+            with open(self.journal_file, 'ab') as journal_file:
+                # Новый журнал начинается с маркера: по нему восстановление отличает формат с пакетами
+                journal_file.write((BATCH_END if journal_file.tell() == 0 else b'') + data + BATCH_END)
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+            self._ensure_journal()
+            logging.info(f"В журнал {self.journal_file} добавлено записей: {count}")
+            if self._journal_size >= self.compact_threshold:
+                self.compact()
+            return before, self.state()
+
+    def _replace_csv(self, rows):
+        """
+        Атомарная замена основного CSV файла: запись во временный файл, fsync и переименование.
+
+        Перед переименованием сохраняется файл фиксации с идентификатором нового файла,
+        по которому восстановление определяет, успела ли замена произойти. Файл фиксации
+        удаляет вызывающий код, когда служебные файлы операции уже не нужны.
+
+        Args:
+            rows (dict): Записи по студентам: имя -> список [предмет, оценка, результат теста].
+        """
+        tmp_file = self.subjects_file + '.tmp'
+        with open(tmp_file, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(FIELDNAMES)
+            for name, values in rows.items():
+                writer.writerows([name, *record] for record in values)
+            csvfile.flush()
+            os.fsync(csvfile.fileno())
+        with open(self.commit_file, 'w', encoding='utf-8') as commit_file:
+            json.dump(_file_id(tmp_file), commit_file)
+            commit_file.flush()
+            os.fsync(commit_file.fileno())
+        os.replace(tmp_file, self.subjects_file)
+        _fsync_dir(self.subjects_file)
+        self._stamp = None
+
+    def _finish_compaction(self):
+        """
+        Слияние журнала, переименованного в merging_file, с основным CSV.
+
+        Если по файлу фиксации видно, что новый CSV уже установлен, остается только
+        удалить служебные файлы; иначе слияние выполняется заново.
+
+        Записи переносятся как есть, без разбора значений: записи, которые чтение
+        пропускает как поврежденные, из основного файла не удаляются.
+        """
+        committed = None
+        try:
+            with open(self.commit_file, encoding='utf-8') as commit_file:
+                committed = json.load(commit_file)
+        except (OSError, ValueError):
+            pass
+        if committed is None or committed != _file_id(self.subjects_file):
+            rows = {}
+            for name, *values in self._iter_csv_values():
+                rows.setdefault(name, []).append(values)
+            for name, *values in self._iter_journal_values(self.merging_file):
+                rows.setdefault(name, []).append(values)
+            self._replace_csv(rows)
+        # Файл фиксации удаляется последним: пока он есть, повторное слияние не выполняется
+        if os.path.exists(self.merging_file):
+            os.remove(self.merging_file)
+            _fsync_dir(self.merging_file)
+        if os.path.exists(self.commit_file):
+            os.remove(self.commit_file)
+        self._stamp = None
+
+    def compact(self):
+        """
+        Слияние журнала в основной CSV.
+
+        Журнал переименовывается в merging_file, основной файл переписывается через
+        временный файл с группировкой строк по студентам и атомарно заменяется,
+        после чего журнал удаляется, а снимок (или индекс) перестраивается. Прерванное на любом шаге
+        слияние завершается при следующем обращении к хранилищу.
+        """
+        self._recover()
+        with self._locked(exclusive=True):
+            if os.path.exists(self.journal_file):
+                os.replace(self.journal_file, self.merging_file)
+                _fsync_dir(self.journal_file)
+            self._finish_compaction()
+            self._ensure_journal()
+            if self.use_snapshot:
+                self._ensure_snapshot()
+            else:
+                self._ensure_index()
+        logging.info(f"Журнал слит в файл {self.subjects_file}")
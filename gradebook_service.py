@@ -0,0 +1,298 @@
+import asyncio
+import errno
+import json
+import logging
+import os
+import socket
+import stat
+import sys
+from argparse import ArgumentParser
+
+from gradebook import Gradebook
+from python_add_hw import NameDescriptor, Student, setup_logging, validate_grade, validate_test_score
+
+# Адрес сервиса по умолчанию: Unix сокет рядом с рабочим каталогом
+DEFAULT_SOCKET = 'gradebook.sock'
+# Максимальное количество записей, сбрасываемых на диск одной операцией
+MAX_BATCH = 1000
+
+
+def parse_address(address):
+    """
+    Разбор адреса сервиса.
+
+    Args:
+        address (str): Путь к Unix сокету или строка "host:port".
+
+    Returns:
+        tuple: ('unix', путь) или ('tcp', (host, port)).
+    """
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit():
+        return 'tcp', (host or '127.0.0.1', int(port))
+    return 'unix', address
+
+
+def remove_stale_socket(path):
+    """
+    Удаление Unix сокета, оставшегося от остановленного сервиса.
+
+    Сокет удаляется, только если к нему нельзя подключиться (соединение отклонено):
+    сокет работающего сервиса не отбирается у него запуском второго экземпляра.
+
+    Args:
+        path (str): Путь к Unix сокету.
+
+    Raises:
+        OSError: Если по адресу уже работает сервис (errno.EADDRINUSE).
+    """
+    try:
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            return
+    except FileNotFoundError:
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        os.remove(path)
+        logging.info(f"Удален сокет остановленного сервиса: {path}")
+        return
+    finally:
+        probe.close()
+    raise OSError(errno.EADDRINUSE, "Сервис по этому адресу уже запущен", path)
+
+
+class GradebookService:
+    """
+    Сервис журнала оценок, держащий данные студентов в памяти.
+
+    Запросы на чтение обслуживаются сразу и параллельно (средние значения считаются за O(1)),
+    записи ставятся в очередь и сбрасываются на диск единственной задачей-писателем:
+    все записи, накопившиеся в очереди, записываются одной операцией (group commit).
+
+    Файл может изменяться и в обход сервиса (другими процессами): при каждом запросе
+    состояние файлов сравнивается с тем, для которого загружены студенты, и при
+    расхождении кеш сбрасывается. Операции с файлами (и блокировками fcntl) выполняются
+    в потоках, чтобы не останавливать цикл событий.
+
+    Attributes:
+        subjects_file (str): Путь к файлу с предметами и оценками.
+    """
+
+    def __init__(self, subjects_file):
+        """
+        Инициализация сервиса.
+
+        Args:
+            subjects_file (str): Путь к файлу с предметами и оценками.
+        """
+        self.subjects_file = subjects_file
+        self._gradebook = Gradebook.open(subjects_file)
+        self._students = {}
+        # Состояние файлов (Gradebook.state), которому соответствуют студенты в памяти
+        self._state = None
+        self._queue = None
+        self._writer = None
+
+    def _refresh(self):
+        """
+        Сброс студентов в памяти, если файлы изменились (например, записью в обход сервиса).
+        """
+        state = self._gradebook.state()
+        if state != self._state:
+            self._students.clear()
+            self._state = state
+
+    async def _student(self, name):
+        """
+        Студент из памяти; при первом обращении загружается из файла в отдельном потоке.
+        """
+        student = self._students.get(name)
+        if student is None:
+            state = self._state
+            student = await asyncio.to_thread(Student, name, self.subjects_file)
+            # Пока студент загружался, писатель мог изменить файлы: такой результат не кешируется
+            if self._state == state:
+                student = self._students.setdefault(name, student)
+        return student
+
+    async def _write_loop(self):
+        """
+        Задача-писатель: забирает из очереди все накопившиеся записи и сбрасывает их одной операцией.
+        """
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < MAX_BATCH and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            records = [record for record, _ in batch]
+            try:
+                before, after = await asyncio.to_thread(self._gradebook.append_many, records)
+            except Exception as e:
+                logging.error(f"Ошибка записи пакета из {len(records)} записей: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            if before == self._state:
+                # Между записями файлы никто не менял: студенты в памяти дополняются записанным
+                for name, subject, grade, test_score in records:
+                    student = self._students.get(name)
+                    if student is not None:
+                        student._add_to_subject(subject, grade, test_score)
+                self._state = after
+            else:
+                self._students.clear()
+                self._state = None
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+            logging.info(f"Записан пакет из {len(records)} записей")
+
+    async def _write(self, name, subject, grade=None, test_score=None):
+        """
+        Постановка записи в очередь и ожидание ее сброса на диск.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(((name, subject, grade, test_score), future))
+        await future
+
+    async def handle(self, request):
+        """
+        Обработка одного запроса.
+
+        Args:
+            request (dict): Запрос с полем op и параметрами операции.
+
+        Returns:
+            Результат операции.
+
+        Raises:
+            ValueError: Если запрос некорректен.
+        """
+        op = request.get('op')
+        if op == 'students':
+            return await asyncio.to_thread(self._gradebook.students)
+        name = NameDescriptor.validate(request.get('name', ''))
+        if op in ('student', 'average_grade', 'average_test_score'):
+            self._refresh()
+        if op == 'student':
+            return str(await self._student(name))
+        if op == 'average_grade':
+            return (await self._student(name)).get_average_grade()
+        if op == 'average_test_score':
+            return (await self._student(name)).get_average_test_score(request['subject'])
+        if op == 'add_grade':
+            await self._write(name, request['subject'], grade=validate_grade(request['value']))
+            return None
+        if op == 'add_test_score':
+            await self._write(name, request['subject'], test_score=validate_test_score(request['value']))
+            return None
+        raise ValueError(f"Неизвестная операция: {op}")
+
+    async def _serve_client(self, reader, writer):
+        """
+        Обслуживание соединения: по одному JSON запросу на строку, по одному ответу на строку.
+        """
+        try:
+            while line := await reader.readline():
+                try:
+                    result = await self.handle(json.loads(line))
+                    response = {'ok': True, 'result': result}
+                except Exception as e:
+                    logging.error(f"Ошибка обработки запроса {line!r}: {e}")
+                    response = {'ok': False, 'error': str(e)}
+                writer.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, address):
+        """
+        Запуск сервиса.
+
+        Args:
+            address (str): Путь к Unix сокету или строка "host:port".
+        """
+        self._queue = asyncio.Queue()
+        self._writer = asyncio.create_task(self._write_loop())
+        kind, target = parse_address(address)
+        if kind == 'tcp':
+            server = await asyncio.start_server(self._serve_client, *target)
+        else:
+            remove_stale_socket(target)
+            server = await asyncio.start_unix_server(self._serve_client, target)
+        logging.info(f"Сервис журнала оценок запущен: {address}")
+        async with server:
+            await server.serve_forever()
+
+
+class GradebookClient:
+    """
+    Клиент сервиса журнала оценок (блокирующий, для командной строки).
+    """
+
+    def __init__(self, address):
+        """
+        Подключение к сервису.
+
+        Args:
+            address (str): Путь к Unix сокету или строка "host:port".
+        """
+        kind, target = parse_address(address)
+        if kind == 'tcp':
+            self._socket = socket.create_connection(target)
+        else:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.connect(target)
+        self._file = self._socket.makefile('rwb')
+
+    def request(self, op, **params):
+        """
+        Выполнение операции на сервисе.
+
+        Args:
+            op (str): Операция (students, student, average_grade, average_test_score, add_grade, add_test_score).
+            **params: Параметры операции (name, subject, value).
+
+        Returns:
+            Результат операции.
+
+        Raises:
+            ValueError: Если сервис вернул ошибку.
+        """
+        self._file.write(json.dumps({'op': op, **params}, ensure_ascii=False).encode('utf-8') + b'\n')
+        self._file.flush()
+        response = json.loads(self._file.readline())
+        if not response['ok']:
+            raise ValueError(response['error'])
+        return response['result']
+
+    def close(self):
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main():
+    parser = ArgumentParser(description='Сервис журнала оценок')
+    parser.add_argument('--subjects_file', type=str, default='subjects.csv', help='Путь к файлу с предметами и оценками')
+    parser.add_argument('--address', type=str, default=DEFAULT_SOCKET, help='Путь к Unix сокету или host:port')
+    args = parser.parse_args()
+    setup_logging()
+    try:
+        asyncio.run(GradebookService(args.subjects_file).serve(args.address))
+    except KeyboardInterrupt:
+        logging.info("Сервис журнала оценок остановлен")
+    except OSError as e:
+        logging.error(f"Не удалось запустить сервис журнала оценок: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+
+SNAPSHOT_MAGIC = b'GBSN'
+SNAPSHOT_VERSION = 1
+
+# Значение-заглушка для отсутствующей оценки или результата теста в колонках
+MISSING = -1
+
+# Заголовок: сигнатура, версия, порядок байтов (0 - little, 1 - big), размер и время модификации CSV,
+# количество записей, студентов и предметов, размеры блоков имен и названий предметов (байт)
+HEADER = struct.Struct('<4sBBxxQqQIIQQ')
+BYTEORDER = 0 if sys.byteorder == 'little' else 1
+
+
+def _string_table(strings):
+    """
+    Словарь строк: смещения в блоке (количество + 1 значений) и блок UTF-8.
+    """
+    offsets = array('I', [0])
+    blob = bytearray()
+    for string in strings:
+        blob += string.encode('utf-8')
+        offsets.append(len(blob))
+    return offsets, bytes(blob)
+
+
+class GradebookSnapshot:
+    """
+    Бинарный колоночный снимок основного CSV файла журнала оценок.
+
+    Имена студентов и названия предметов хранятся словарями строк, записи - колонками
+    фиксированной ширины (коды студента и предмета, оценка, результат теста; MISSING,
+    если значения нет). Записи сгруппированы по студентам, поэтому записи одного
+    студента - непрерывный диапазон строк колонок.
+
+    Файл открывается через mmap, колонки - memoryview поверх отображенного файла,
+    без разбора и копирования. Снимок действителен, пока размер и время модификации
+    CSV совпадают с сохраненными в заголовке; журнал новых записей в снимок не входит.
+
+    Порядок разделов файла (все числа в порядке байтов машины, записавшей снимок):
+    заголовок HEADER; колонки 'I': код студента записи, смещения имен, смещения
+    предметов, начало записей каждого студента; колонка 'H': код предмета;
+    колонки 'b': оценка, результат теста; блоки UTF-8 имен и предметов.
+
+    Attributes:
+        names (list): Имена студентов; индекс в списке - код студента.
+        subjects (list): Названия предметов; индекс в списке - код предмета.
+        student_codes (memoryview): Код студента для каждой записи.
+        subject_codes (memoryview): Код предмета для каждой записи.
+        grades (memoryview): Оценка для каждой записи (MISSING, если нет).
+        test_scores (memoryview): Результат теста для каждой записи (MISSING, если нет).
+    """
+
+    def __init__(self, buffer, stamp):
+        """
+        Разметка колонок поверх содержимого файла снимка.
+
+        Args:
+            buffer (mmap.mmap | bytes): Содержимое файла снимка.
+            stamp (list): Размер и время модификации CSV, для которого сделан снимок.
+
+        Raises:
+            ValueError: Если файл поврежден, другой версии или сделан для другого состояния CSV.
+        """
+        if len(buffer) < HEADER.size:
+            raise ValueError("Файл снимка обрезан")
+        magic, version, byteorder, csv_size, csv_mtime_ns, rows, name_count, subject_count, names_size, subjects_size = (
+            HEADER.unpack_from(buffer)
+        )
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION or byteorder != BYTEORDER:
+            raise ValueError("Неподдерживаемый формат снимка")
+        if [csv_size, csv_mtime_ns] != stamp:
+            raise ValueError("Снимок сделан для другого состояния CSV файла")
+        if len(buffer) != HEADER.size + rows * 8 + (name_count * 2 + subject_count + 3) * 4 + names_size + subjects_size:
+            raise ValueError("Размер файла снимка не соответствует заголовку")
+
+        self._buffer = buffer
+        self.stamp = stamp
+        view = memoryview(buffer)
+        position = HEADER.size
+
+        def column(typecode, count):
+            nonlocal position
+            size = count * array(typecode).itemsize
+            result = view[position:position + size].cast(typecode)
+            position += size
+            return result
+
+        self.student_codes = column('I', rows)
+        name_offsets = column('I', name_count + 1)
+        subject_offsets = column('I', subject_count + 1)
+        self._starts = column('I', name_count + 1)
+        self.subject_codes = column('H', rows)
+        self.grades = column('b', rows)
+        self.test_scores = column('b', rows)
+        names_blob = view[position:position + names_size]
+        subjects_blob = view[position + names_size:position + names_size + subjects_size]
+        # Строки словарей декодируются один раз при открытии (их на порядки меньше, чем записей)
+        self.names = [str(names_blob[start:end], 'utf-8') for start, end in zip(name_offsets, name_offsets[1:])]
+        self.subjects = [str(subjects_blob[start:end], 'utf-8') for start, end in zip(subject_offsets, subject_offsets[1:])]
+        self._name_codes = {name: code for code, name in enumerate(self.names)}
+
+    def __len__(self):
+        return len(self.grades)
+
+    @classmethod
+    def load(cls, path, stamp):
+        """
+        Открытие снимка через mmap.
+
+        Args:
+            path (str): Путь к файлу снимка.
+            stamp (list): Текущие размер и время модификации CSV.
+
+        Returns:
+            GradebookSnapshot | None: Снимок или None, если файла нет или он устарел.
+        """
+        try:
+            with open(path, 'rb') as file:
+                buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        try:
+            return cls(buffer, stamp)
+        except (ValueError, struct.error) as e:
+            logging.info(f"Снимок {path} не используется: {e}")
+            return None
+
+    @staticmethod
+    def write(path, stamp, rows):
+        """
+        Построение снимка из записей CSV и атомарное сохранение (временный файл и переименование).
+
+        Args:
+            path (str): Путь к файлу снимка.
+            stamp (list): Размер и время модификации CSV, из которого прочитаны записи.
+            rows (iterable): Кортежи (имя, предмет, оценка, результат теста); None - нет значения.
+
+        Raises:
+            OverflowError: Если значение не помещается в колонку (например, поврежденная оценка 1000).
+        """
+        name_codes = {}
+        subject_codes = {}
+        grouped = []
+        for name, subject, grade, test_score in rows:
+            name_code = name_codes.get(name)
+            if name_code is None:
+                name_code = name_codes[name] = len(name_codes)
+                grouped.append((array('H'), array('b'), array('b')))
+            subject_code = subject_codes.get(subject)
+            if subject_code is None:
+                subject_code = subject_codes[subject] = len(subject_codes)
+            subjects_column, grades_column, scores_column = grouped[name_code]
+            subjects_column.append(subject_code)
+            grades_column.append(MISSING if grade is None else grade)
+            scores_column.append(MISSING if test_score is None else test_score)
+
+        student_codes = array('I')
+        starts = array('I', [0])
+        subjects_column, grades_column, scores_column = array('H'), array('b'), array('b')
+        for name_code, (subjects_part, grades_part, scores_part) in enumerate(grouped):
+            student_codes.extend([name_code] * len(subjects_part))
+            starts.append(len(student_codes))
+            subjects_column += subjects_part
+            grades_column += grades_part
+            scores_column += scores_part
+        name_offsets, names_blob = _string_table(name_codes)
+        subject_offsets, subjects_blob = _string_table(subject_codes)
+
+        header = HEADER.pack(
+            SNAPSHOT_MAGIC, SNAPSHOT_VERSION, BYTEORDER, stamp[0], stamp[1], len(student_codes),
+            len(name_codes), len(subject_codes), len(names_blob), len(subjects_blob)
+        )
+        # Снимок могут строить одновременно несколько читателей, поэтому временный файл у каждого свой
+        tmp_file = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_file, 'wb') as file:
+                file.write(header)
+                for column in (student_codes, name_offsets, subject_offsets, starts, subjects_column, grades_column, scores_column):
+                    column.tofile(file)
+                file.write(names_blob)
+                file.write(subjects_blob)
+            os.replace(tmp_file, path)
+        finally:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+        logging.info(f"Сохранен снимок {path}: записей {len(student_codes)}, студентов {len(name_codes)}")
+
+    def read_student(self, name):
+        """
+        Записи указанного студента.
+
+        Args:
+            name (str): Имя студента.
+
+        Yields:
+            tuple: (предмет, оценка, результат теста); отсутствующие значения равны None.
+        """
+        code = self._name_codes.get(name)
+        if code is None:
+            return
+        subjects = self.subjects
+        for row in range(self._starts[code], self._starts[code + 1]):
+            grade = self.grades[row]
+            test_score = self.test_scores[row]
+            yield (subjects[self.subject_codes[row]],
+                   None if grade == MISSING else grade,
+                   None if test_score == MISSING else test_score)
+
+    def iter_rows(self):
+        """
+        Все записи снимка (сгруппированные по студентам).
+
+        Yields:
+            tuple: (имя, предмет, оценка, результат теста); отсутствующие значения равны None.
+        """
+        names = self.names
+        subjects = self.subjects
+        for name_code, subject_code, grade, test_score in zip(self.student_codes, self.subject_codes, self.grades, self.test_scores):
+            yield (names[name_code], subjects[subject_code],
+                   None if grade == MISSING else grade,
+                   None if test_score == MISSING else test_score)
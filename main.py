@@ -0,0 +1,57 @@
+# Единая точка входа для утилит репозитория. Импортируется только модуль выбранной команды,
+# поэтому запуск (в том числе --help и одиночные запросы из скриптов) не платит за остальные.
+# Запуск: python main.py dates "1-й четверг ноября"
+#         python main.py scan . --format jsonl
+#         python main.py student "Иван Иванов" --average_grade
+#         python main.py service --address gradebook.sock
+
+import sys
+
+# Команда -> (модуль, описание); у модуля вызывается main(), аргументы команды передаются через sys.argv
+COMMANDS = {
+    'dates': ('python15_4-5', "Преобразование текста вида '1-й четверг ноября' в дату"),
+    'scan': ('python15_6', 'Обход директории и вывод информации о содержимом'),
+    'student': ('python_add_hw', 'Управление данными студента'),
+    'service': ('gradebook_service', 'Сервис журнала оценок'),
+}
+
+
+def usage():
+    """
+    Текст справки со списком команд.
+    """
+    lines = ['Использование: python main.py <команда> [аргументы команды]', '', 'Команды:']
+    lines += [f'  {command:<10} {description}' for command, (_, description) in COMMANDS.items()]
+    lines += ['', 'Справка по команде: python main.py <команда> --help']
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    """
+    Запуск команды.
+
+    Args:
+        argv (list, optional): Аргументы командной строки без имени программы; по умолчанию sys.argv[1:].
+
+    Returns:
+        int: Код завершения.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ('-h', '--help'):
+        print(usage())
+        return 0
+    command = COMMANDS.get(argv[0])
+    if command is None:
+        print(f'Неизвестная команда: {argv[0]}\n\n{usage()}', file=sys.stderr)
+        return 2
+
+    import importlib
+
+    module = importlib.import_module(command[0])
+    sys.argv = [f'{sys.argv[0]} {argv[0]}', *argv[1:]]
+    module.main()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
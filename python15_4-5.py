@@ -3,13 +3,15 @@
 # Логируйте ошибки, если текст не соответсвует формату.
 
 import datetime
+import collections
+import functools
+import itertools
 import logging
 import re
-import argparse
-import doctest
+import sys
 
-# Настраиваем логирование: ошибки будут записываться в файл errors.log
-logging.basicConfig(level=logging.ERROR, filename='task15_4.log')
+# Модули, нужные только части команд (calendar, json, argparse, concurrent.futures), импортируются
+# там, где используются, а файл лога настраивается в main(): запуск CLI не платит за лишние импорты
 
 # Словарь для преобразования названий дней недели в числовые значения (0 = понедельник, 6 = воскресенье)
 days_of_week = {
@@ -57,92 +59,627 @@ months = {
     "12": 12
 }
 
-def parse_date(text):
+# Номер вхождения "последний" день недели в месяце
+LAST = -1
+
+# Формы названий дней недели, принимаемые разбором: падежи (именительный, винительный,
+# родительный), английские названия и сокращения
+DAY_FORMS = {
+    0: ("понедельник", "понедельника", "monday", "mon"),
+    1: ("вторник", "вторника", "tuesday", "tue"),
+    2: ("среда", "среду", "среды", "wednesday", "wed"),
+    3: ("четверг", "четверга", "thursday", "thu"),
+    4: ("пятница", "пятницу", "пятницы", "friday", "fri"),
+    5: ("суббота", "субботу", "субботы", "saturday", "sat"),
+    6: ("воскресенье", "воскресенья", "sunday", "sun"),
+}
+
+# Формы названий месяцев: падежи (именительный, родительный, предложный), английские названия и сокращения
+MONTH_FORMS = {
+    1: ("январь", "января", "январе", "january", "jan"),
+    2: ("февраль", "февраля", "феврале", "february", "feb"),
+    3: ("март", "марта", "марте", "march", "mar"),
+    4: ("апрель", "апреля", "апреле", "april", "apr"),
+    5: ("май", "мая", "мае", "may"),
+    6: ("июнь", "июня", "июне", "june", "jun"),
+    7: ("июль", "июля", "июле", "july", "jul"),
+    8: ("август", "августа", "августе", "august", "aug"),
+    9: ("сентябрь", "сентября", "сентябре", "september", "sep"),
+    10: ("октябрь", "октября", "октябре", "october", "oct"),
+    11: ("ноябрь", "ноября", "ноябре", "november", "nov"),
+    12: ("декабрь", "декабря", "декабре", "december", "dec"),
+}
+
+# Окончания порядкового числительного после номера недели ("1-й", "2-ая", "3rd")
+ORDINAL_SUFFIXES = ("й", "я", "е", "ий", "ый", "ой", "ая", "ья", "ое", "ье", "st", "nd", "rd", "th")
+
+# Формы слова "последний" ("последняя пятница", "last friday")
+LAST_FORMS = ("последний", "последняя", "последнее", "последнюю", "последней", "last")
+
+# Таблицы "форма в нижнем регистре -> номер" для каждого слова текста даты, собранные из словарей:
+# каждое слово разбирается одним поиском в таблице, без регулярных выражений и перебора вариантов
+day_names = {**days_of_week, **{form: day_num for day_num, forms in DAY_FORMS.items() for form in forms}}
+month_names = {**months, **{form: month_num for month_num, forms in MONTH_FORMS.items() for form in forms}}
+week_names = {
+    **{f"{week_num}{sep}{suffix}": week_num for week_num in range(32) for suffix in ORDINAL_SUFFIXES for sep in ("", "-")},
+    **{str(week_num): week_num for week_num in range(32)},
+    **{form: LAST for form in LAST_FORMS},
+}
+
+# Предлоги перед месяцем ("в ноябре", "of March")
+MONTH_PREPOSITIONS = frozenset(("в", "of"))
+
+# Номер недели, не попавший в таблицу (например, "45-й"): число с необязательным окончанием
+ORDINAL_PATTERN = re.compile(rf'(\d+)(?:-?(?:{"|".join(ORDINAL_SUFFIXES)}))?')
+
+# Месяцы, в которых срабатывает правило, для периодов "каждого месяца" и "каждого квартала"
+RULE_PERIODS = {
+    "месяца": tuple(range(1, 13)),
+    "квартала": (1, 4, 7, 10),
+}
+
+# Коды ошибок разбора (для потоковой обработки): неверный формат, дата за пределами месяца
+# и дата, которой нет в заданном году (например, 29 февраля опорной даты в невисокосном году)
+ERROR_FORMAT = 'format'
+ERROR_OUT_OF_MONTH = 'out_of_month'
+ERROR_INVALID_DATE = 'invalid_date'
+
+# Количество строк в одной порции потоковой обработки
+STREAM_CHUNK = 10000
+
+# Экранирование текста в поле tsv: табуляция и перевод строки внутри текста не должны ломать колонки
+TSV_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+class DateParseError(ValueError):
+    """
+    Ошибка разбора текста даты с кодом ошибки (ERROR_FORMAT или ERROR_OUT_OF_MONTH).
+    """
+
+    def __init__(self, message, code):
+        super().__init__(message)
+        self.code = code
+
+@functools.lru_cache(maxsize=None)
+def _first_weekday_table(year):
+    """
+    Таблица первых вхождений дней недели для всех месяцев года.
+
+    Args:
+        year (int): Год.
+
+    Returns:
+        tuple: Для каждого месяца (индекс 1-12) - (число дней в месяце, кортеж из 7 чисел:
+        день месяца, на который приходится первый понедельник, вторник, ..., воскресенье).
+    """
+    import calendar
+
+    table = [None]
+    for month in range(1, 13):
+        first_weekday, days_in_month = calendar.monthrange(year, month)
+        table.append((days_in_month, tuple(1 + (day_num - first_weekday) % 7 for day_num in range(7))))
+    return tuple(table)
+
+def _nth_weekday(year, month_num, day_num, week_num):
+    """
+    День месяца, на который приходится week_num-й заданный день недели.
+
+    Args:
+        year (int): Год.
+        month_num (int): Месяц (1-12).
+        day_num (int): День недели (0 = понедельник, 6 = воскресенье).
+        week_num (int): Номер вхождения дня недели в месяце (с 1); -1 - последний в месяце.
+
+    Returns:
+        int | None: День месяца или None, если дата выходит за пределы месяца.
+    """
+    days_in_month, first_days = _first_weekday_table(year)[month_num]
+    if week_num == LAST:
+        return first_days[day_num] + (days_in_month - first_days[day_num]) // 7 * 7
+    day = first_days[day_num] + (week_num - 1) * 7
+    return day if 1 <= day <= days_in_month else None
+
+def _parse_week(word):
+    """
+    Номер недели по первому слову текста ("1-й", "2-ая", "3rd", "последнюю", "last").
+
+    Args:
+        word (str): Слово в нижнем регистре.
+
+    Returns:
+        int | None: Номер недели, LAST или None, если слово не является номером недели.
+    """
+    week_num = week_names.get(word)
+    if week_num is None:
+        match = ORDINAL_PATTERN.fullmatch(word)
+        if match:
+            week_num = int(match.group(1))
+    return week_num
+
+def _parse_phrase(text, now):
+    """
+    Разбор текста на номер недели, день недели и месяц.
+
+    Args:
+        text (str): Текст вида "1-й четверг ноября".
+        now (datetime.date): Дата, из которой берутся опущенные день недели и месяц.
+
+    Returns:
+        tuple | None: (номер недели, день недели, месяц) или None для пустой строки.
+
+    Raises:
+        DateParseError: Если текст не соответствует формату.
+    """
+    words = text.lower().split()
+    if not words:
+        return None
+
+    # Грамматика: <номер недели> [<день недели>] [в|of] [<месяц>]; каждое слово - один поиск в таблице
+    week_num = _parse_week(words[0])
+    if week_num is None:
+        raise DateParseError(f"Неправильный формат строки: {text.strip()}", ERROR_FORMAT)
+    position = 1
+    day_num = day_names.get(words[1]) if len(words) > 1 else None
+    if day_num is None:
+        day_num = now.weekday()
+    else:
+        position = 2
+    if position < len(words) and words[position] in MONTH_PREPOSITIONS:
+        position += 1
+        # После предлога месяц обязателен ("1-й of" - ошибка формата, а не текущий месяц)
+        if position == len(words):
+            raise DateParseError(f"Неправильный формат строки: {text.strip()}", ERROR_FORMAT)
+    month_num = now.month
+    if position < len(words):
+        month_num = month_names.get(words[position])
+        if month_num is None:
+            raise DateParseError(f"Ошибка при разборе строки: неизвестное слово '{words[position]}'", ERROR_FORMAT)
+        position += 1
+    if position != len(words):
+        raise DateParseError(f"Неправильный формат строки: {text.strip()}", ERROR_FORMAT)
+    return week_num, day_num, month_num
+
+def _resolve(parts, year, today):
+    """
+    Дата по разобранному тексту в заданном году.
+
+    Args:
+        parts (tuple | None): Результат _parse_phrase.
+        year (int): Год.
+        today (datetime.date): Опорная дата (для пустого текста берутся ее месяц и день).
+
+    Returns:
+        datetime.date: Дата.
+
+    Raises:
+        DateParseError: Если дата выходит за пределы месяца.
+    """
+    # Если строка пустая, используем текущие значения
+    if parts is None:
+        return today.replace(year=year)
+    week_num, day_num, month_num = parts
+    # Вычисляем день месяца по таблице первых вхождений дней недели
+    day = _nth_weekday(year, month_num, day_num, week_num)
+    # Проверяем, что полученная дата попадает в правильный месяц
+    if day is None:
+        raise DateParseError(f"Дата выходит за пределы месяца: {week_num}-й {day_num + 1} {month_num}", ERROR_OUT_OF_MONTH)
+    return datetime.date(year, month_num, day)
+
+def parse_date(text, today=None, year=None):
     """
     Функция для преобразования текста вида "1-й четверг ноября" в дату текущего года.
     Если параметры опущены, используются текущие значения.
 
-        Примеры:
-    >>> parse_date("1-й четверг ноября")
+        Примеры (опорная дата - четверг 11 июля 2024 года):
+    >>> today = datetime.date(2024, 7, 11)
+    >>> parse_date("1-й четверг ноября", today)
     datetime.date(2024, 11, 7)
-    >>> parse_date("3-я среда мая")
+    >>> parse_date("3-я среда мая", today)
     datetime.date(2024, 5, 15)
-    >>> parse_date("2-я пятница июня")
+    >>> parse_date("2-я пятница июня", today)
     datetime.date(2024, 6, 14)
-    >>> parse_date("5-й вторник февраля")  # Пример, когда 5-й вторник выходит за пределы месяца
+    >>> print(parse_date("5-й вторник февраля", today))  # Пример, когда 5-й вторник выходит за пределы месяца
     None
-    >>> parse_date("1-й вторник 12")  # Числовой месяц
+    >>> parse_date("1-й вторник 12", today)  # Числовой месяц
     datetime.date(2024, 12, 3)
-    >>> parse_date("2-я 3 6")  # Числовые день недели и месяц
+    >>> parse_date("2-я 3 6", today)  # Числовые день недели и месяц
     datetime.date(2024, 6, 12)
-    >>> parse_date("3-я 2 7")  # Числовые день недели и месяц
+    >>> parse_date("3-я 2 7", today)  # Числовые день недели и месяц
     datetime.date(2024, 7, 16)
-    >>> parse_date("")  # Пустая строка, берутся текущие значения
+    >>> parse_date("", today)  # Пустая строка, берутся текущие значения
     datetime.date(2024, 7, 11)
-    >>> parse_date("3-я")  # Опущены день недели и месяц, берутся текущие значения
-    datetime.date(2024, 7, 24)
-    >>> parse_date("4-й вторник")  # Опущен месяц, берется текущий месяц
+    >>> parse_date("3-я", today)  # Опущены день недели и месяц, берутся текущие значения
+    datetime.date(2024, 7, 18)
+    >>> parse_date("4-й вторник", today)  # Опущен месяц, берется текущий месяц
     datetime.date(2024, 7, 23)
+    >>> parse_date("1-й четверг ноября", today, year=2027)  # Явно заданный год
+    datetime.date(2027, 11, 4)
+    >>> parse_date("Последняя пятница в ноябре", today)  # Падежные формы и "последний"
+    datetime.date(2024, 11, 29)
+    >>> parse_date("2nd Monday of March", today)  # Английские названия
+    datetime.date(2024, 3, 11)
+    >>> print(parse_date("1-й of", today))  # Предлог без месяца
+    None
+
+    Args:
+        text (str): Текст для преобразования.
+        today (datetime.date, optional): Опорная дата: из нее берутся год и опущенные день недели и месяц.
+            По умолчанию - сегодняшняя дата.
+        year (int, optional): Год результата вместо года опорной даты.
+
+    Returns:
+        datetime.date | None: Дата или None, если текст не удалось преобразовать.
     """
 
-    # Получаем текущие значения для года, месяца и дня недели
-    now = datetime.datetime.now()
-    current_year = now.year
-    current_month = now.month
-    current_day_num = now.weekday()
-    current_day = now.day
+    # Получаем опорную дату: из нее берутся год и опущенные день недели и месяц
+    today = datetime.date.today() if today is None else today
 
-    # Если строка пустая, используем текущие значения
-    if not text.strip():
-        return datetime.date(current_year, current_month, current_day)
-    else:
-        # Регулярное выражение для извлечения номера недели, дня недели и месяца из строки
-        match = re.match(r'(\d+)-[йя]?\s?(\w+)?\s?(\w+)?', text.strip())
+    try:
+        return _resolve(_parse_phrase(text, today), today.year if year is None else year, today)
+    except ValueError as e:
+        # Логируем ошибку, если текст не соответствует формату или дата выходит за пределы месяца
+        logging.error(f"{e} ({text})")
+        return None
+
+def _to_numpy(dates):
+    """
+    Преобразование списка дат в numpy.ndarray с типом datetime64[D] (None -> NaT).
+    """
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError("Для as_numpy=True требуется пакет numpy") from e
+    return numpy.array([numpy.datetime64('NaT') if date is None else date for date in dates], dtype='datetime64[D]')
 
-        if not match:
-            logging.error(f"Неправильный формат строки: {text}")
-            return None
+def parse_dates(texts, year=None, as_numpy=False, today=None):
+    """
+    Пакетное преобразование текстов вида "3-я среда мая" в даты.
+
+    Одинаковые тексты разбираются один раз, первые вхождения дней недели берутся
+    из таблицы, посчитанной один раз на год.
 
-        # Извлекаем номер недели, день недели и месяц из найденных групп
-        week_num, day_name, month_name = match.groups()
+        Примеры:
+    >>> parse_dates(["1-й четверг ноября", "3-я среда мая", "1-й четверг ноября", "5-й вторник февраля"], year=2024)
+    [datetime.date(2024, 11, 7), datetime.date(2024, 5, 15), datetime.date(2024, 11, 7), None]
 
+    Args:
+        texts (iterable): Тексты для преобразования.
+        year (int, optional): Год; по умолчанию год опорной даты.
+        as_numpy (bool): Вернуть numpy.ndarray с типом datetime64[D] (NaT для ошибок) вместо списка.
+        today (datetime.date, optional): Опорная дата для опущенных дня недели и месяца; по умолчанию сегодня.
+
+    Returns:
+        list | numpy.ndarray: Даты; None (или NaT) для текстов, которые не удалось преобразовать.
+    """
+    today = datetime.date.today() if today is None else today
+    year = today.year if year is None else year
+    cache = {}
+    results = []
+    for text in texts:
+        if text in cache:
+            results.append(cache[text])
+            continue
         try:
-            # Преобразуем номер недели в целое число
-            week_num = int(week_num) if week_num else 1
-            # Преобразуем название дня недели в его числовое значение
-            day_num = days_of_week[day_name.lower()] if day_name else current_day_num
-            # Преобразуем название месяца в его числовое значение
-            month_num = months[month_name.lower()] if month_name else current_month
-        except KeyError as e:
-            # Логируем ошибку, если не удалось преобразовать название дня недели или месяца
-            logging.error(f"Ошибка при разборе строки: {e}")
-            return None
-
-    # Определяем первый день заданного месяца
-    first_day_of_month = datetime.date(current_year, month_num, 1)
-    # Определяем день недели первого дня месяца (0 = понедельник, 6 = воскресенье)
-    first_day_of_month_weekday = first_day_of_month.weekday()
-
-    # Вычисляем первый заданный день недели в этом месяце
-    if first_day_of_month_weekday <= day_num:
-        # Если первый день месяца раньше или совпадает с нужным днем недели, вычисляем дату
-        day = 1 + day_num - first_day_of_month_weekday
-    else:
-        # Если первый день месяца позже нужного дня недели, переходим на следующую неделю
-        day = 1 + 7 - (first_day_of_month_weekday - day_num)
+            result = _resolve(_parse_phrase(text, today), year, today)
+        except ValueError as e:
+            logging.error(f"{e} ({text})")
+            result = None
+        cache[text] = result
+        results.append(result)
+    return _to_numpy(results) if as_numpy else results
 
-    # Вычисляем дату нужной недели
-    day += (week_num - 1) * 7
+def parse_date_range(text, years, as_numpy=False, today=None):
+    """
+    Преобразование одного текста в даты для каждого года из диапазона.
 
-    # Получаем итоговую дату, прибавляя рассчитанное количество дней к первому дню месяца
-    result_date = first_day_of_month + datetime.timedelta(days=day - 1)
+    Текст разбирается один раз, для каждого года дата получается из таблицы
+    первых вхождений дней недели без повторного разбора.
 
-    # Проверяем, что полученная дата попадает в правильный месяц
-    if result_date.month != month_num:
-        logging.error(f"Дата выходит за пределы месяца: {text}")
-        return None
+        Примеры:
+    >>> parse_date_range("1-й четверг ноября", range(2024, 2028))
+    [datetime.date(2024, 11, 7), datetime.date(2025, 11, 6), datetime.date(2026, 11, 5), datetime.date(2027, 11, 4)]
+    >>> parse_date_range("5-й понедельник марта", range(2024, 2027))
+    [None, datetime.date(2025, 3, 31), datetime.date(2026, 3, 30)]
+
+    Args:
+        text (str): Текст для преобразования.
+        years (iterable): Годы.
+        as_numpy (bool): Вернуть numpy.ndarray с типом datetime64[D] (NaT для ошибок) вместо списка.
+        today (datetime.date, optional): Опорная дата для опущенных дня недели и месяца; по умолчанию сегодня.
+
+    Returns:
+        list | numpy.ndarray: Даты по годам; None (или NaT), если в году такой даты нет.
+        Если текст не соответствует формату, все значения - None.
+    """
+    today = datetime.date.today() if today is None else today
+    years = list(years)
+    try:
+        parts = _parse_phrase(text, today)
+    except ValueError as e:
+        logging.error(f"{e} ({text})")
+        parts = False
+    results = []
+    for year in years:
+        try:
+            results.append(None if parts is False else _resolve(parts, year, today))
+        except ValueError:
+            results.append(None)
+    return _to_numpy(results) if as_numpy else results
+
+class RecurrenceRule:
+    """
+    Правило повторения вида "последний пятница каждого месяца" или "2-я среда каждого квартала".
+
+    Текст разбирается один раз (см. compile_rule), даты генерируются лениво
+    по таблицам первых вхождений дней недели.
+
+        Примеры:
+    >>> rule = compile_rule("последний пятница каждого месяца")
+    >>> rule.next(3, after=datetime.date(2024, 7, 11))
+    [datetime.date(2024, 7, 26), datetime.date(2024, 8, 30), datetime.date(2024, 9, 27)]
+    >>> compile_rule("2-я среда каждого квартала").between(datetime.date(2024, 1, 1), datetime.date(2024, 12, 31))
+    [datetime.date(2024, 1, 10), datetime.date(2024, 4, 10), datetime.date(2024, 7, 10), datetime.date(2024, 10, 9)]
+    >>> compile_rule("1-й четверг ноября каждого года").next(2, after=datetime.date(2024, 11, 7))
+    [datetime.date(2025, 11, 6), datetime.date(2026, 11, 5)]
+
+    Attributes:
+        week_num (int): Номер вхождения дня недели в месяце (1-5) или LAST.
+        day_num (int): День недели (0 = понедельник, 6 = воскресенье).
+        months (tuple): Месяцы, в которых срабатывает правило.
+    """
+
+    def __init__(self, week_num, day_num, months):
+        """
+        Args:
+            week_num (int): Номер вхождения дня недели в месяце (1-5) или LAST.
+            day_num (int): День недели (0 = понедельник, 6 = воскресенье).
+            months (iterable): Месяцы (1-12), в которых срабатывает правило.
+
+        Raises:
+            ValueError: Если номер вхождения или месяцы недопустимы.
+        """
+        if week_num != LAST and not 1 <= week_num <= 5:
+            raise ValueError(f"Номер дня недели в месяце должен быть от 1 до 5: {week_num}")
+        self.week_num = week_num
+        self.day_num = day_num
+        self.months = tuple(sorted(set(months)))
+        if not self.months or not all(1 <= month <= 12 for month in self.months):
+            raise ValueError(f"Недопустимые месяцы правила: {self.months}")
+
+    def __repr__(self):
+        return f"RecurrenceRule(week_num={self.week_num}, day_num={self.day_num}, months={self.months})"
+
+    def occurrences(self, start=None, end=None):
+        """
+        Генератор дат правила начиная с start (включительно).
+
+        Args:
+            start (datetime.date, optional): Начальная дата; по умолчанию сегодня.
+            end (datetime.date, optional): Конечная дата (включительно); без нее генератор бесконечный.
+
+        Yields:
+            datetime.date: Очередная дата.
+        """
+        start = datetime.date.today() if start is None else start
+        year = start.year
+        # Пятого дня недели может не быть ни в одном месяце правила несколько лет подряд,
+        # но не дольше полного цикла календаря (400 лет)
+        last_found = year
+        while end is None or year <= end.year:
+            for month in self.months:
+                day = _nth_weekday(year, month, self.day_num, self.week_num)
+                if day is None:
+                    continue
+                date = datetime.date(year, month, day)
+                if date < start:
+                    continue
+                if end is not None and date > end:
+                    return
+                last_found = year
+                yield date
+            year += 1
+            if year - last_found > 400 or year > datetime.MAXYEAR:
+                return
+
+    def next(self, count, after=None):
+        """
+        Следующие count дат строго после after.
+
+        Args:
+            count (int): Количество дат.
+            after (datetime.date, optional): Дата, после которой искать; по умолчанию сегодня.
+
+        Returns:
+            list: Даты по возрастанию.
+        """
+        after = datetime.date.today() if after is None else after
+        return list(itertools.islice(self.occurrences(after + datetime.timedelta(days=1)), count))
+
+    def between(self, start, end):
+        """
+        Все даты правила в окне [start, end].
+
+        Returns:
+            list: Даты по возрастанию.
+        """
+        return list(self.occurrences(start, end))
+
+@functools.lru_cache(maxsize=1024)
+def compile_rule(text):
+    """
+    Разбор текста правила повторения в объект RecurrenceRule (результат кешируется).
+
+    Поддерживаются тексты вида "2-я среда каждого месяца", "последнюю пятницу каждого квартала",
+    "1-й четверг ноября каждого года" (или просто "1-й четверг ноября", "1-й четверг в ноябре").
+    Номер недели, день недели и месяц разбираются по тем же таблицам форм, что и в parse_date.
+
+        Примеры:
+    >>> compile_rule("2-ая среда каждого месяца")
+    RecurrenceRule(week_num=2, day_num=2, months=(1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12))
+    >>> compile_rule("Last Friday каждого квартала")
+    RecurrenceRule(week_num=-1, day_num=4, months=(1, 4, 7, 10))
+    >>> compile_rule("последнюю пятницу в ноябре каждого года")
+    RecurrenceRule(week_num=-1, day_num=4, months=(11,))
+
+    Args:
+        text (str): Текст правила.
+
+    Returns:
+        RecurrenceRule: Правило.
+
+    Raises:
+        ValueError: Если текст не соответствует формату.
+    """
+    # Грамматика: <номер недели> <день недели> (каждого месяца|каждого квартала|[в|of] <месяц> [каждого года])
+    words = text.lower().split()
+    if len(words) < 3:
+        raise ValueError(f"Неправильный формат правила: {text}")
+    week_num = _parse_week(words[0])
+    if week_num is None:
+        raise ValueError(f"Ошибка при разборе правила: неизвестный номер недели '{words[0]}'")
+    day_num = day_names.get(words[1])
+    if day_num is None:
+        raise ValueError(f"Ошибка при разборе правила: неизвестный день недели '{words[1]}'")
+    rest = words[2:]
+    if len(rest) == 2 and rest[0] == "каждого" and rest[1] in RULE_PERIODS:
+        return RecurrenceRule(week_num, day_num, RULE_PERIODS[rest[1]])
+    if rest[0] in MONTH_PREPOSITIONS:
+        rest = rest[1:]
+    if rest[1:] not in ([], ["каждого", "года"]):
+        raise ValueError(f"Неправильный формат правила: {text}")
+    month_num = month_names.get(rest[0]) if rest else None
+    if month_num is None:
+        raise ValueError(f"Неправильный формат правила: {text}")
+    return RecurrenceRule(week_num, day_num, (month_num,))
+
+@functools.lru_cache(maxsize=65536)
+def _cached_resolve(text, year, today):
+    """
+    Разбор текста с кешированием: одинаковые строки потока разбираются один раз.
+
+    Returns:
+        tuple: (дата или None, код ошибки или None).
+    """
+    try:
+        return _resolve(_parse_phrase(text, today), year, today), None
+    except ValueError as e:
+        # Как и в parse_date, ошибка одной строки не прерывает обработку: ValueError
+        # от datetime (год вне диапазона, 29 февраля) получает свой код ошибки
+        logging.error(f"{e} ({text})")
+        return None, e.code if isinstance(e, DateParseError) else ERROR_INVALID_DATE
 
-    return result_date
+def _resolve_chunk(lines, year, today):
+    """
+    Разбор порции строк (выполняется и в процессах пула).
+
+    Returns:
+        list: (текст, дата или None, код ошибки или None) для каждой строки.
+    """
+    return [(text, *_cached_resolve(text, year, today)) for text in lines]
+
+def _iter_chunks(stream, size):
+    """
+    Чтение потока порциями строк (без перевода строки в конце).
+    """
+    while True:
+        chunk = [line.rstrip('\r\n') for line in itertools.islice(stream, size)]
+        if not chunk:
+            return
+        yield chunk
+
+def resolve_stream(stream, year=None, today=None, processes=0, chunk_size=STREAM_CHUNK):
+    """
+    Потоковое преобразование строк в даты (одна строка - один текст).
+
+    Строки читаются порциями по chunk_size; повторяющиеся строки берутся из кеша.
+    При processes > 0 порции разбираются в пуле процессов, порядок строк сохраняется.
+
+    Args:
+        stream (iterable): Источник строк (файл или sys.stdin).
+        year (int, optional): Год; по умолчанию год опорной даты.
+        today (datetime.date, optional): Опорная дата; по умолчанию сегодня.
+        processes (int): Количество процессов (0 - разбор в текущем процессе).
+        chunk_size (int): Количество строк в порции.
+
+    Yields:
+        list: Порция результатов (текст, дата или None, код ошибки или None).
+    """
+    today = datetime.date.today() if today is None else today
+    year = today.year if year is None else year
+    chunks = _iter_chunks(stream, chunk_size)
+    if not processes:
+        for chunk in chunks:
+            yield _resolve_chunk(chunk, year, today)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        # Держим в работе не больше двух порций на процесс, чтобы не читать весь вход в память
+        pending = collections.deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_resolve_chunk, chunk, year, today))
+            if len(pending) >= processes * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def write_results(results, output, fmt='tsv'):
+    """
+    Буферизованная запись результатов потоковой обработки: одна операция записи на порцию.
+
+    Формат tsv: "номер строки<TAB>текст<TAB>дата<TAB>код ошибки" (пустые поля для отсутствующих значений);
+    обратная косая черта, табуляция и переводы строк в тексте экранируются как \\\\, \\t, \\n и \\r.
+    Формат jsonl: {"line": ..., "text": ..., "date": ..., "error": ...}.
+
+    Args:
+        results (iterable): Порции результатов (см. resolve_stream).
+        output (file): Поток вывода.
+        fmt (str): 'tsv' или 'jsonl'.
+
+    Returns:
+        tuple: (количество строк, количество ошибок).
+    """
+    import json
+
+    line_num = 0
+    errors = 0
+    for chunk in results:
+        lines = []
+        for text, date, code in chunk:
+            line_num += 1
+            if code:
+                errors += 1
+            if fmt == 'jsonl':
+                lines.append(json.dumps(
+                    {'line': line_num, 'text': text, 'date': date.isoformat() if date else None, 'error': code},
+                    ensure_ascii=False
+                ))
+            else:
+                lines.append(f"{line_num}\t{text.translate(TSV_ESCAPES)}\t{date.isoformat() if date else ''}\t{code or ''}")
+        lines.append('')
+        output.write('\n'.join(lines))
+    output.flush()
+    return line_num, errors
+
+def _parse_year(value):
+    """
+    Разбор года для командной строки: целое число от datetime.MINYEAR до datetime.MAXYEAR.
+    """
+    import argparse
+
+    if not re.fullmatch(r'\d{1,4}', value.strip()) or int(value) < datetime.MINYEAR:
+        raise argparse.ArgumentTypeError(f"Год должен быть от {datetime.MINYEAR} до {datetime.MAXYEAR}: {value}")
+    return int(value)
+
+def _parse_years(value):
+    """
+    Разбор диапазона лет для командной строки: "2024-2073" или "2024:2073" (включительно).
+    """
+    import argparse
+
+    match = re.fullmatch(r'(\d{1,4})\s*[-:]\s*(\d{1,4})', value)
+    if not match or not datetime.MINYEAR <= int(match.group(1)) <= int(match.group(2)):
+        raise argparse.ArgumentTypeError(f"Неправильный диапазон лет: {value}")
+    return range(int(match.group(1)), int(match.group(2)) + 1)
 
 '''
 # Пример использования, согласно семинара - передаём параметры в теле кода
@@ -160,15 +697,58 @@ else:
 # например 'python python15_4.py
 
 def main():
+    import argparse
+
     # Настраиваем аргументы командной строки
     parser = argparse.ArgumentParser(description="Преобразование текста вида '1-й четверг ноября' в дату текущего года.")
     parser.add_argument("text", type=str, nargs='?', default="", help="Текст для преобразования в дату")
+    parser.add_argument("--year", type=_parse_year, help="Год (по умолчанию текущий)")
+    parser.add_argument("--years", type=_parse_years, metavar="FROM-TO", help="Диапазон лет, например 2024-2073: вывести дату для каждого года")
+    parser.add_argument("--stdin", action="store_true", help="Читать тексты построчно из стандартного ввода")
+    parser.add_argument("--input", type=str, metavar="FILE", help="Читать тексты построчно из файла")
+    parser.add_argument("--format", choices=["tsv", "jsonl"], default="tsv", help="Формат вывода для --stdin/--input")
+    parser.add_argument("--processes", type=int, default=0, metavar="N", help="Разбирать строки в пуле из N процессов (для --stdin/--input)")
+    parser.add_argument("--next", type=int, metavar="K", help="Считать текст правилом повторения ('последний пятница каждого месяца') и вывести K ближайших дат")
     
     # Парсим аргументы командной строки
     args = parser.parse_args()
+
+    # Настраиваем логирование: ошибки будут записываться в файл task15_4.log
+    logging.basicConfig(level=logging.ERROR, filename='task15_4.log')
+
+    if args.stdin or args.input:
+        # Потоковый режим: одна строка входа - одна строка результата
+        try:
+            stream = sys.stdin if args.stdin else open(args.input, encoding='utf-8')
+        except OSError as e:
+            parser.error(f"Не удалось открыть файл {args.input}: {e.strerror}")
+        try:
+            write_results(resolve_stream(stream, year=args.year, processes=args.processes), sys.stdout, args.format)
+        finally:
+            if not args.stdin:
+                stream.close()
+        return
+
+    if args.next:
+        # Выводим ближайшие даты правила повторения
+        try:
+            rule = compile_rule(args.text)
+        except ValueError as e:
+            logging.error(e)
+            print("Ошибка при обработке правила.")
+            return
+        for date in rule.next(args.next):
+            print(f"Дата: {date}")
+        return
+
+    if args.years:
+        # Выводим дату для каждого года диапазона
+        for year, date in zip(args.years, parse_date_range(args.text, args.years)):
+            print(f"{year}: {date if date else 'нет такой даты'}")
+        return
     
     # Получаем дату из текста
-    date = parse_date(args.text)
+    date = parse_date(args.text, year=args.year)
     
     # Выводим результат
     if date:
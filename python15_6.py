@@ -1,67 +1,680 @@
 import os
+import csv
+import heapq
+import json
 import logging
+import queue
+import sys
 from collections import namedtuple
-from argparse import ArgumentParser
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from fnmatch import fnmatchcase
 
 # Определение namedtuple для хранения информации о файлах и каталогах
 FileInfo = namedtuple('FileInfo', ['name', 'extension', 'is_dir', 'parent'])
 
-def get_directory_contents(directory):
+# Изменение в директории по сравнению со снимком: kind - 'added', 'removed' или 'modified'
+Change = namedtuple('Change', ['kind', 'path', 'info'])
+
+# Версия формата файла снимка
+SNAPSHOT_VERSION = 1
+# Виды элементов в снимке: файл, каталог, символическая ссылка на каталог (не обходится)
+ENTRY_FILE, ENTRY_DIR, ENTRY_DIR_LINK = 0, 1, 2
+
+# Количество потоков для чтения каталогов по умолчанию (как у ThreadPoolExecutor)
+DEFAULT_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+# Максимальное количество каталогов в одном задании для пула процессов
+PROCESS_BATCH = 64
+
+# Форматы вывода и количество элементов, записываемых одной операцией
+OUTPUT_FORMATS = ('repr', 'jsonl', 'csv', 'sqlite')
+OUTPUT_BATCH = 4096
+
+# Параметры обхода, применяемые прямо во время чтения каталогов:
+# include - шаблоны имен файлов (fnmatch), которые нужно выдавать (None - все файлы);
+# exclude - шаблоны имен файлов и каталогов, которые пропускаются (каталоги не обходятся);
+# prune - шаблоны имен каталогов, которые выдаются, но не обходятся;
+# max_depth - глубина обхода (0 - только содержимое самой директории, None - без ограничений);
+# with_size - получать размеры файлов (нужно для агрегатов по размеру).
+ScanOptions = namedtuple('ScanOptions', ['include', 'exclude', 'prune', 'max_depth', 'with_size'],
+                         defaults=[None, None, None, None, False])
+
+def _matches(name, patterns):
+    """
+    Проверка имени по списку шаблонов fnmatch.
+    """
+    return any(fnmatchcase(name, pattern) for pattern in patterns)
+
+def _scan_directory(path, depth=0, options=ScanOptions(), errors=None):
+    """
+    Чтение одного каталога через os.scandir с применением фильтров.
+
+    Args:
+    - path (str): Путь до каталога.
+    - depth (int): Глубина каталога относительно корня обхода.
+    - options (ScanOptions): Параметры обхода.
+    - errors (list | None): Список для ошибок чтения (путь, текст ошибки). Если не задан,
+      ошибка сразу пишется в лог.
+
+    Returns:
+    - tuple: (список (имя, размер) для файлов, список (имя, путь, нужно_ли_обходить) для подкаталогов).
+      Размер равен None, если options.with_size не задан.
+    """
+    files = []
+    dirs = []
+    descend = options.max_depth is None or depth < options.max_depth
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                name = entry.name
+                if options.exclude and _matches(name, options.exclude):
+                    continue
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    # Как и os.walk, символические ссылки на каталоги не обходим
+                    walk = descend and not entry.is_symlink() and not (options.prune and _matches(name, options.prune))
+                    dirs.append((name, entry.path, walk))
+                elif options.include is None or _matches(name, options.include):
+                    size = None
+                    if options.with_size:
+                        try:
+                            size = entry.stat(follow_symlinks=False).st_size
+                        except OSError:
+                            size = 0
+                    files.append((name, size))
+    except OSError as e:
+        if errors is None:
+            logging.warning('Cannot read directory %s: %s', path, e)
+        else:
+            errors.append((path, str(e)))
+    return files, dirs
+
+def _file_infos(path, files, dirs, log):
+    """
+    Формирование объектов FileInfo для содержимого одного каталога.
+
+    Args:
+    - path (str): Путь до каталога.
+    - files (list): Файлы (имя, размер).
+    - dirs (list): Подкаталоги (имя, путь, нужно_ли_обходить).
+    - log (bool): Логировать ли каждый элемент.
+
+    Yields:
+    - FileInfo: Сначала файлы, затем подкаталоги (в том же порядке, что и os.walk).
+    """
+    parent_dir = os.path.basename(path)  # Получаем имя родительской директории
+    for name, _ in files:
+        file_name, extension = os.path.splitext(name)
+        if log:
+            logging.info('File - Name: %s, Extension: %s, Parent: %s', file_name, extension, parent_dir)
+        yield FileInfo(name=file_name, extension=extension, is_dir=False, parent=parent_dir)
+    for name, _, _ in dirs:
+        if log:
+            logging.info('Directory - Name: %s, Parent: %s', name, parent_dir)
+        yield FileInfo(name=name, extension='', is_dir=True, parent=parent_dir)
+
+def _scan_batch(batch, options):
+    """
+    Чтение пачки каталогов в процессе пула.
+
+    Ошибки чтения возвращаются вместе с результатом, а не пишутся в лог: обработчик
+    логов процесса пула (унаследованный QueueHandler с очередью в памяти) до
+    QueueListener родительского процесса не доходит.
+
+    Args:
+    - batch (list): Каталоги (путь, глубина).
+    - options (ScanOptions): Параметры обхода.
+
+    Returns:
+    - tuple: (список (путь, глубина, файлы, подкаталоги) для каждого каталога, список ошибок (путь, текст ошибки)).
+    """
+    errors = []
+    return [(path, depth, *_scan_directory(path, depth, options, errors)) for path, depth in batch], errors
+
+def _iter_scan_processes(directories, processes, options):
+    """
+    Обход нескольких директорий в пуле процессов.
+
+    Непрочитанные каталоги всех корней лежат в общей очереди, из которой свободные
+    процессы получают задания: пока каталогов мало, каждый уходит отдельным заданием
+    (большое поддерево расходится по всем процессам), когда их много - они
+    объединяются в пачки до PROCESS_BATCH, чтобы мелкие каталоги не тратили
+    время на передачу между процессами.
+
+    Args:
+    - directories (list): Пути до директорий.
+    - processes (int): Количество процессов.
+    - options (ScanOptions): Параметры обхода.
+
+    Yields:
+    - tuple: (путь до каталога, файлы, подкаталоги) - см. _scan_directory.
+    """
+    queue_dirs = deque((directory, 0) for directory in directories)
+    pending = set()
+    # Пул процессов (и multiprocessing) импортируется только для обхода с --processes
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        try:
+            while queue_dirs or pending:
+                # Держим в работе по два задания на процесс
+                while queue_dirs and len(pending) < processes * 2:
+                    size = max(1, min(PROCESS_BATCH, len(queue_dirs) // (processes * 2)))
+                    batch = [queue_dirs.popleft() for _ in range(min(size, len(queue_dirs)))]
+                    pending.add(executor.submit(_scan_batch, batch, options))
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results, errors = future.result()
+                    for path, error in errors:
+                        logging.warning('Cannot read directory %s: %s', path, error)
+                    for path, depth, files, dirs in results:
+                        queue_dirs.extend((sub_path, depth + 1) for _, sub_path, walk in dirs if walk)
+                        yield path, files, dirs
+        finally:
+            for future in pending:
+                future.cancel()
+
+def _iter_scan(directory, workers, ordered, options, processes=0):
+    """
+    Обход директории в пуле потоков (или процессов) с выдачей содержимого по каталогам.
+
+    Args:
+    - directory (str | list): Путь до директории или список путей.
+    - workers (int): Количество потоков для чтения каталогов.
+    - ordered (bool): Выдавать каталоги в порядке os.walk (сверху вниз). Иначе - в порядке готовности.
+      С пулом процессов порядок всегда - по готовности.
+    - options (ScanOptions): Параметры обхода.
+    - processes (int): Количество процессов; 0 - обход потоками в текущем процессе.
+
+    Yields:
+    - tuple: (путь до каталога, файлы, подкаталоги) - см. _scan_directory.
+    """
+    directories = [directory] if isinstance(directory, str) else list(directory)
+    if processes:
+        yield from _iter_scan_processes(directories, processes, options)
+        return
+    for directory in directories:
+        yield from _iter_scan_threads(directory, workers, ordered, options)
+
+def _iter_scan_threads(directory, workers, ordered, options):
+    """
+    Обход одной директории в пуле потоков (см. _iter_scan).
+    """
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        if ordered:
+            # Стек (путь, future) в обратном порядке: обход в глубину, как в os.walk,
+            # при этом подкаталоги читаются заранее в фоне
+            stack = [(directory, 0, executor.submit(_scan_directory, directory, 0, options))]
+            while stack:
+                path, depth, future = stack.pop()
+                files, dirs = future.result()
+                yield path, files, dirs
+                children = [
+                    (sub_path, depth + 1, executor.submit(_scan_directory, sub_path, depth + 1, options))
+                    for _, sub_path, walk in dirs if walk
+                ]
+                stack.extend(reversed(children))
+        else:
+            pending = {executor.submit(_scan_directory, directory, 0, options): (directory, 0)}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path, depth = pending.pop(future)
+                    files, dirs = future.result()
+                    for _, sub_path, walk in dirs:
+                        if walk:
+                            pending[executor.submit(_scan_directory, sub_path, depth + 1, options)] = (sub_path, depth + 1)
+                    yield path, files, dirs
+    finally:
+        # Если обход прерван, не дочитываем оставшиеся каталоги
+        executor.shutdown(wait=True, cancel_futures=True)
+
+def iter_directory_contents(directory, workers=DEFAULT_WORKERS, ordered=False, options=ScanOptions(), processes=0):
+    """
+    Потоковый обход директории: каталоги читаются через os.scandir в пуле потоков,
+    результаты отдаются по мере готовности, без накопления всего списка.
+
+    Args:
+    - directory (str | list): Путь до директории или список путей.
+    - workers (int): Количество потоков для чтения каталогов.
+    - ordered (bool): Отдавать элементы в порядке os.walk (сверху вниз). Иначе - в порядке готовности.
+    - options (ScanOptions): Фильтры и ограничение глубины, применяемые во время обхода.
+    - processes (int): Читать каталоги в пуле из стольких процессов (0 - потоками в текущем процессе).
+
+    Yields:
+    - FileInfo: Информация о файлах и каталогах.
+    """
+    log = logging.getLogger().isEnabledFor(logging.INFO)
+    for path, files, dirs in _iter_scan(directory, workers, ordered, options, processes):
+        yield from _file_infos(path, files, dirs, log)
+
+def get_directory_contents(directory, workers=DEFAULT_WORKERS):
     """
     Функция для получения содержимого директории.
 
     Args:
     - directory (str): Путь до директории, содержимое которой нужно получить.
+    - workers (int): Количество потоков для чтения каталогов.
 
     Returns:
     - list: Список объектов namedtuple FileInfo, содержащих информацию о файлах и каталогах.
     """
-    contents = []
+    return list(iter_directory_contents(directory, workers=workers, ordered=True))
 
-    # Рекурсивно обходим директорию
-    for root, dirs, files in os.walk(directory):
-        parent_dir = os.path.basename(root)  # Получаем имя родительской директории
+def aggregate_directory(directory, by=('extension', 'parent'), largest=0, workers=DEFAULT_WORKERS, options=ScanOptions(), processes=0):
+    """
+    Агрегаты по файлам директории за один потоковый проход, без хранения всех элементов.
 
-        # Обрабатываем файлы в текущей директории
-        for name in files:
-            file_name, extension = os.path.splitext(name)
-            # Добавляем информацию о файле в список contents
-            contents.append(FileInfo(name=file_name, extension=extension, is_dir=False, parent=parent_dir))
-            # Логируем информацию о файле
-            logging.info(f'File - Name: {file_name}, Extension: {extension}, Parent: {parent_dir}')
+    Args:
+    - directory (str | list): Путь до директории или список путей.
+    - by (iterable): Группировки: 'extension' (по расширению) и/или 'parent' (по пути родительского каталога).
+    - largest (int): Сколько самых больших файлов вернуть.
+    - workers (int): Количество потоков для чтения каталогов.
+    - options (ScanOptions): Фильтры и ограничение глубины, применяемые во время обхода.
+    - processes (int): Читать каталоги в пуле из стольких процессов (0 - потоками в текущем процессе).
 
-        # Обрабатываем поддиректории в текущей директории
-        for name in dirs:
-            # Добавляем информацию о директории в список contents
-            contents.append(FileInfo(name=name, extension='', is_dir=True, parent=parent_dir))
-            # Логируем информацию о директории
-            logging.info(f'Directory - Name: {name}, Parent: {parent_dir}')
+    Returns:
+    - dict: Для каждой группировки - словарь ключ -> [количество, суммарный размер];
+      'largest' - список (размер, путь) по убыванию размера.
+    """
+    options = options._replace(with_size=True)
+    groups = {key: {} for key in by}
+    by_extension = groups.get('extension')
+    by_parent = groups.get('parent')
+    heap = []
+    for path, files, _ in _iter_scan(directory, workers, False, options, processes):
+        parent_stats = None
+        if by_parent is not None and files:
+            parent_stats = by_parent.setdefault(path, [0, 0])
+        for name, size in files:
+            if by_extension is not None:
+                stats = by_extension.setdefault(os.path.splitext(name)[1], [0, 0])
+                stats[0] += 1
+                stats[1] += size
+            if parent_stats is not None:
+                parent_stats[0] += 1
+                parent_stats[1] += size
+            if largest:
+                # Куча из largest элементов: на вершине - наименьший из самых больших файлов
+                if len(heap) < largest:
+                    heapq.heappush(heap, (size, os.path.join(path, name)))
+                elif size > heap[0][0]:
+                    heapq.heapreplace(heap, (size, os.path.join(path, name)))
+    result = dict(groups)
+    if largest:
+        result['largest'] = sorted(heap, reverse=True)
+    return result
+
+def _snapshot_directory(path, previous, verify_files):
+    """
+    Снимок одного каталога и его сравнение с предыдущим снимком.
 
-    return contents
+    Если время модификации каталога не изменилось, список его элементов берется
+    из предыдущего снимка без чтения каталога (кроме режима verify_files).
+
+    Args:
+    - path (str): Путь до каталога.
+    - previous (dict | None): Снимок каталога из прошлого запуска.
+    - verify_files (bool): Всегда перечитывать каталог, чтобы заметить изменение файлов на месте.
+
+    Returns:
+    - tuple: (снимок каталога, список изменений (вид, имя, элемент)).
+    """
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError as e:
+        logging.warning('Cannot read directory %s: %s', path, e)
+        return previous, []
+    if previous is not None and previous['mtime_ns'] == mtime_ns and not verify_files:
+        return previous, []
+
+    entries = {}
+    try:
+        with os.scandir(path) as scan:
+            for entry in scan:
+                try:
+                    stat = entry.stat(follow_symlinks=False)
+                    if entry.is_dir():
+                        kind = ENTRY_DIR_LINK if entry.is_symlink() else ENTRY_DIR
+                    else:
+                        kind = ENTRY_FILE
+                except OSError:
+                    continue
+                # Для каталогов размер и время модификации не сравниваются: их содержимое проверяется отдельно
+                if kind == ENTRY_DIR:
+                    entries[entry.name] = [kind, 0, 0, stat.st_ino]
+                else:
+                    entries[entry.name] = [kind, stat.st_size, stat.st_mtime_ns, stat.st_ino]
+    except OSError as e:
+        logging.warning('Cannot read directory %s: %s', path, e)
+        return previous, []
+
+    old_entries = previous['entries'] if previous else {}
+    changes = []
+    for name, entry in entries.items():
+        old_entry = old_entries.get(name)
+        if old_entry is None:
+            changes.append(('added', name, entry))
+        elif old_entry != entry:
+            changes.append(('modified', name, entry))
+    for name, entry in old_entries.items():
+        if name not in entries:
+            changes.append(('removed', name, entry))
+    return {'mtime_ns': mtime_ns, 'entries': entries}, changes
+
+def _change(kind, directory, rel_dir, name, entry):
+    """
+    Формирование объекта Change для элемента каталога.
+    """
+    path = os.path.join(directory, rel_dir, name) if rel_dir else os.path.join(directory, name)
+    parent_dir = os.path.basename(os.path.join(directory, rel_dir) if rel_dir else directory)
+    if entry[0] == ENTRY_FILE:
+        file_name, extension = os.path.splitext(name)
+        info = FileInfo(name=file_name, extension=extension, is_dir=False, parent=parent_dir)
+    else:
+        info = FileInfo(name=name, extension='', is_dir=True, parent=parent_dir)
+    return Change(kind=kind, path=path, info=info)
+
+def iter_changes(directory, previous, current, workers=DEFAULT_WORKERS, verify_files=False):
+    """
+    Обход директории с выдачей только изменений по сравнению с предыдущим снимком.
+
+    Каталоги, время модификации которых не изменилось, не перечитываются (их подкаталоги
+    при этом проверяются). Изменение содержимого файла на месте не меняет время
+    модификации каталога, поэтому для его обнаружения нужен режим verify_files.
+
+    Args:
+    - directory (str): Путь до директории.
+    - previous (dict | None): Предыдущий снимок (см. load_snapshot) или None при первом запуске.
+    - current (dict): Пустой словарь, который заполняется новым снимком по ходу обхода.
+    - workers (int): Количество потоков для чтения каталогов.
+    - verify_files (bool): Перечитывать все каталоги, чтобы заметить изменение файлов на месте.
+
+    Yields:
+    - Change: Добавленные, удаленные и измененные элементы.
+    """
+    old_dirs = previous['dirs'] if previous else {}
+    new_dirs = {}
+    current.update({'version': SNAPSHOT_VERSION, 'dirs': new_dirs})
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        def submit(rel_dir):
+            path = os.path.join(directory, rel_dir) if rel_dir else directory
+            return executor.submit(_snapshot_directory, path, old_dirs.get(rel_dir), verify_files)
+
+        pending = {submit(''): ''}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                rel_dir = pending.pop(future)
+                record, changes = future.result()
+                if record is None:
+                    continue
+                new_dirs[rel_dir] = record
+                for name, entry in record['entries'].items():
+                    if entry[0] == ENTRY_DIR:
+                        child = os.path.join(rel_dir, name) if rel_dir else name
+                        pending[submit(child)] = child
+                for kind, name, entry in changes:
+                    yield _change(kind, directory, rel_dir, name, entry)
+
+    # Содержимое исчезнувших каталогов тоже считается удаленным
+    for rel_dir, record in old_dirs.items():
+        if rel_dir not in new_dirs:
+            for name, entry in record['entries'].items():
+                yield _change('removed', directory, rel_dir, name, entry)
+
+def load_snapshot(snapshot_file):
+    """
+    Загрузка снимка директории.
+
+    Args:
+    - snapshot_file (str): Путь до файла снимка.
+
+    Returns:
+    - dict | None: Снимок или None, если файла нет или он в другом формате.
+    """
+    try:
+        with open(snapshot_file, encoding='utf-8') as file:
+            snapshot = json.load(file)
+    except FileNotFoundError:
+        return None
+    except ValueError as e:
+        logging.warning('Snapshot %s is damaged and will be rebuilt: %s', snapshot_file, e)
+        return None
+    return snapshot if snapshot.get('version') == SNAPSHOT_VERSION else None
+
+def save_snapshot(snapshot, snapshot_file):
+    """
+    Сохранение снимка директории (через временный файл).
+
+    Args:
+    - snapshot (dict): Снимок, заполненный iter_changes.
+    - snapshot_file (str): Путь до файла снимка.
+    """
+    tmp_file = snapshot_file + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as file:
+        json.dump(snapshot, file, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_file, snapshot_file)
+
+def _as_row(item):
+    """
+    Плоское представление FileInfo или Change в виде кортежа полей.
+    """
+    if isinstance(item, Change):
+        return (item.kind, item.path, *item.info)
+    return tuple(item)
+
+class TextSink:
+    """
+    Буферизованный вывод в текстовом формате (repr, JSON Lines или CSV).
+
+    Элементы накапливаются и записываются в поток пачками по batch_size штук.
+    """
+
+    def __init__(self, stream, fmt, fields, batch_size=OUTPUT_BATCH, close_stream=False):
+        """
+        Args:
+        - stream (file): Поток вывода.
+        - fmt (str): Формат: 'repr', 'jsonl' или 'csv'.
+        - fields (tuple): Названия полей элемента (для JSON Lines и заголовка CSV).
+        - batch_size (int): Количество элементов в одной записи.
+        - close_stream (bool): Закрыть поток в close() (для файлов, открытых open_sink).
+        """
+        self.stream = stream
+        self.close_stream = close_stream
+        self.fmt = fmt
+        self.fields = fields
+        self.batch_size = batch_size
+        self._batch = []
+        if fmt == 'csv':
+            self._csv = csv.writer(stream)
+            self._csv.writerow(fields)
+
+    def write(self, item):
+        self._batch.append(item)
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._batch:
+            return
+        if self.fmt == 'csv':
+            self._csv.writerows(_as_row(item) for item in self._batch)
+        elif self.fmt == 'jsonl':
+            self.stream.write(''.join(
+                json.dumps(dict(zip(self.fields, _as_row(item))), ensure_ascii=False) + '\n' for item in self._batch
+            ))
+        else:
+            self.stream.write(''.join(f'{item!r}\n' for item in self._batch))
+        self._batch.clear()
+
+    def close(self):
+        self.flush()
+        if self.close_stream:
+            self.stream.close()
+        else:
+            self.stream.flush()
+
+class SqliteSink:
+    """
+    Вывод в базу SQLite (таблица entries), пачками через executemany в одной транзакции.
+    """
+
+    def __init__(self, database, fields, batch_size=OUTPUT_BATCH):
+        """
+        Args:
+        - database (str): Путь до файла базы.
+        - fields (tuple): Названия полей элемента (столбцы таблицы).
+        - batch_size (int): Количество элементов в одной вставке.
+        """
+        import sqlite3
+
+        self.connection = sqlite3.connect(database)
+        self.batch_size = batch_size
+        self._batch = []
+        columns = ', '.join(fields)
+        self.connection.execute('DROP TABLE IF EXISTS entries')
+        self.connection.execute(f'CREATE TABLE entries ({columns})')
+        self._insert = f"INSERT INTO entries ({columns}) VALUES ({', '.join('?' * len(fields))})"
+
+    def write(self, item):
+        self._batch.append(_as_row(item))
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._batch:
+            self.connection.executemany(self._insert, self._batch)
+            self._batch.clear()
+
+    def close(self):
+        self.flush()
+        self.connection.commit()
+        self.connection.close()
+
+def open_sink(fmt, output, fields):
+    """
+    Создание вывода в заданном формате.
+
+    Args:
+    - fmt (str): Формат из OUTPUT_FORMATS.
+    - output (str | None): Путь до файла вывода; None - стандартный вывод (кроме sqlite).
+    - fields (tuple): Названия полей элемента.
+
+    Returns:
+    - TextSink | SqliteSink: Объект с методами write и close.
+    """
+    if fmt == 'sqlite':
+        return SqliteSink(output, fields)
+    if output:
+        stream = open(output, 'w', newline='', encoding='utf-8', buffering=1 << 20)
+        return TextSink(stream, fmt, fields, close_stream=True)
+    return TextSink(sys.stdout, fmt, fields)
+
+def _start_file_logging(filename):
+    """
+    Логирование в файл через очередь: запись в файл выполняется отдельным потоком QueueListener.
+
+    Returns:
+    - QueueListener: Запущенный обработчик очереди (остановить через stop()).
+    """
+    from logging.handlers import QueueHandler, QueueListener
+
+    log_queue = queue.SimpleQueue()
+    file_handler = logging.FileHandler(filename, encoding='utf-8')
+    file_handler.setFormatter(logging.Formatter('%(message)s'))
+    listener = QueueListener(log_queue, file_handler)
+    root = logging.getLogger()
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(logging.INFO)
+    listener.start()
+    return listener
 
 def main():
+    from argparse import ArgumentParser
+
     # Настройка парсера аргументов командной строки
     parser = ArgumentParser(description='Process directory path.')
-    parser.add_argument('directory', type=str, help='Path to the directory')
+    parser.add_argument('directory', type=str, nargs='+', help='Path to the directory (several paths are scanned together)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Number of threads reading directories')
+    parser.add_argument('--ordered', action='store_true', help='Output entries in os.walk order instead of as soon as they are read')
+    parser.add_argument('--processes', type=int, default=0, metavar='N', help='Read directories in a pool of N processes (0 - threads in this process)')
+    parser.add_argument('--snapshot', type=str, metavar='FILE', help='Snapshot file: output only changes since the previous run and update it')
+    parser.add_argument('--verify_files', action='store_true', help='With --snapshot, reread unchanged directories to detect files modified in place')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='repr', help='Output format')
+    parser.add_argument('--output', type=str, metavar='FILE', help='Output file (standard output by default; required for sqlite)')
+    parser.add_argument('--include', action='append', metavar='PATTERN', help='Only output files matching the glob pattern (repeatable)')
+    parser.add_argument('--exclude', action='append', metavar='PATTERN', help='Skip files and directories matching the glob pattern (repeatable)')
+    parser.add_argument('--prune', action='append', metavar='PATTERN', help='Do not descend into directories matching the glob pattern (repeatable)')
+    parser.add_argument('--max_depth', type=int, metavar='N', help='Maximum directory depth to descend into (0 - only the directory itself)')
+    parser.add_argument('--aggregate', action='append', choices=['extension', 'parent'], help='Output file count and total size per extension or parent directory instead of entries')
+    parser.add_argument('--largest', type=int, default=0, metavar='N', help='Output the N largest files instead of entries')
     args = parser.parse_args()
+    if args.format == 'sqlite' and not args.output:
+        parser.error('--output is required for --format sqlite')
+    options = ScanOptions(include=args.include, exclude=args.exclude, prune=args.prune, max_depth=args.max_depth)
+    if args.snapshot and (options != ScanOptions() or len(args.directory) > 1):
+        parser.error('--snapshot works with a single directory and without --include/--exclude/--prune/--max_depth')
+    if args.ordered and args.processes:
+        parser.error('--ordered cannot be combined with --processes')
 
-    # Получаем путь до директории из аргументов командной строки
-    directory = args.directory
+    # Получаем пути до директорий из аргументов командной строки
+    directories = args.directory
 
-    # Проверяем, является ли указанный путь действительной директорией
-    if not os.path.isdir(directory):
-        print(f"The path {directory} is not a valid directory.")
-        return
+    # Проверяем, являются ли указанные пути действительными директориями
+    for directory in directories:
+        if not os.path.isdir(directory):
+            print(f"The path {directory} is not a valid directory.")
+            return
 
-    # Настройка логирования для записи в файл text.txt
-    logging.basicConfig(filename='task15_6.txt', level=logging.INFO, format='%(message)s', encoding='utf-8')
+    # Настройка логирования для записи в файл task15_6.txt (запись в файл - в отдельном потоке)
+    listener = _start_file_logging('task15_6.txt')
+    try:
+        if args.snapshot:
+            directory = directories[0]
+            # Сравниваем с прошлым снимком и выводим только изменения
+            previous = load_snapshot(args.snapshot)
+            if previous is not None and previous.get('root') != os.path.abspath(directory):
+                previous = None
+            current = {}
+            sink = open_sink(args.format, args.output, ('kind', 'path', *FileInfo._fields))
+            try:
+                for change in iter_changes(directory, previous, current, workers=args.workers, verify_files=args.verify_files):
+                    logging.info('%s - %s', change.kind, change.path)
+                    sink.write(change)
+            finally:
+                sink.close()
+            current['root'] = os.path.abspath(directory)
+            save_snapshot(current, args.snapshot)
+            return
 
-    # Получаем содержимое директории
-    contents = get_directory_contents(directory)
+        if args.aggregate or args.largest:
+            # Выводим только агрегаты, посчитанные за один проход
+            result = aggregate_directory(directories, by=args.aggregate or (), largest=args.largest, workers=args.workers, options=options, processes=args.processes)
+            for key in args.aggregate or ():
+                print(f'By {key}:')
+                for group, (count, size) in sorted(result[key].items(), key=lambda item: item[1][1], reverse=True):
+                    print(f'  {group or "<none>"}: {count} files, {size} bytes')
+            if args.largest:
+                print(f'Largest {args.largest} files:')
+                for size, path in result['largest']:
+                    print(f'  {size} {path}')
+            return
 
-    # Выводим содержимое на экран
-    for item in contents:
-        print(item)
+        # Получаем содержимое директории и выводим его пачками в выбранном формате
+        sink = open_sink(args.format, args.output, FileInfo._fields)
+        try:
+            for item in iter_directory_contents(directories, workers=args.workers, ordered=args.ordered, options=options, processes=args.processes):
+                sink.write(item)
+        finally:
+            sink.close()
+    finally:
+        listener.stop()
 
 if __name__ == '__main__':
     main()
@@ -1,10 +1,27 @@
-import argparse
 import csv
 import logging
 import os
 import sys
+from array import array
 
-logging.basicConfig(filename='hw.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', encoding='utf-8')
+from gradebook import GRADE_RANGE, TEST_SCORE_RANGE, Gradebook, RunningStats
+
+# Формат записей лога (файл hw.log и консоль)
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+def setup_logging(console=False):
+    """
+    Настройка логирования в файл hw.log (вызывается при запуске из командной строки, а не при импорте).
+
+    Args:
+        console (bool): Дублировать сообщения в консоль.
+    """
+    logging.basicConfig(filename='hw.log', level=logging.INFO, format=LOG_FORMAT, encoding='utf-8')
+    if console:
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(logging.INFO)
+        console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        logging.getLogger().addHandler(console_handler)
 
 class NameDescriptor:
     """
@@ -16,9 +33,71 @@ class NameDescriptor:
         return instance._name
     
     def __set__(self, instance, value):
+        instance._name = self.validate(value)
+
+    @staticmethod
+    def validate(value):
+        """
+        Проверка ФИО без привязки к экземпляру (используется и при массовом импорте).
+
+        Raises:
+            ValueError: Если ФИО не соответствует условию.
+        """
         if not value.istitle() or not value.replace(' ', '').isalpha():
             raise ValueError("ФИО должно состоять только из букв и начинаться с заглавной буквы")
-        instance._name = value
+        return value
+
+def validate_grade(grade):
+    """
+    Проверка оценки (целое число от 2 до 5).
+
+    Raises:
+        ValueError: Если оценка не соответствует допустимому диапазону.
+    """
+    if not isinstance(grade, int) or grade not in GRADE_RANGE:
+        raise ValueError("Оценка должна быть целым числом от 2 до 5")
+    return grade
+
+def validate_test_score(test_score):
+    """
+    Проверка результата теста (целое число от 0 до 100).
+
+    Raises:
+        ValueError: Если результат теста не соответствует допустимому диапазону.
+    """
+    if not isinstance(test_score, int) or test_score not in TEST_SCORE_RANGE:
+        raise ValueError("Результат теста должен быть целым числом от 0 до 100")
+    return test_score
+
+class SubjectRecord:
+    """
+    Компактное хранение оценок и результатов тестов по одному предмету.
+
+    Оценки (2-5) хранятся в array('b'), результаты тестов (0-100) - в array('B'),
+    то есть по одному байту на значение. Доступ record['grades'] и
+    record['test_scores'] сохранен для совместимости со словарным представлением.
+
+    Attributes:
+        grades (array): Оценки.
+        test_scores (array): Результаты тестов.
+        grade_stats (RunningStats): Накопленная статистика оценок.
+        test_score_stats (RunningStats): Накопленная статистика результатов тестов.
+    """
+    __slots__ = ('grades', 'test_scores', 'grade_stats', 'test_score_stats')
+
+    def __init__(self):
+        self.grades = array('b')
+        self.test_scores = array('B')
+        self.grade_stats = RunningStats()
+        self.test_score_stats = RunningStats()
+
+    def __getitem__(self, key):
+        if key not in ('grades', 'test_scores'):
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __repr__(self):
+        return f"{{'grades': {self.grades.tolist()}, 'test_scores': {self.test_scores.tolist()}}}"
 
 class Student:
     """
@@ -26,9 +105,13 @@ class Student:
 
     Attributes:
         name (str): Имя студента.
-        subjects (dict): Словарь для хранения предметов и связанных с ними оценок и результатов тестов.
+        subjects (dict): Словарь для хранения предметов и связанных с ними оценок и результатов тестов (SubjectRecord).
         subjects_file (str): Путь к файлу с предметами и оценками.
+
+    Средние значения считаются по накопленным суммам (RunningStats), которые
+    обновляются при загрузке и добавлении оценок, поэтому запрос среднего - O(1).
     """
+    __slots__ = ('_name', 'subjects', 'subjects_file', '_all_grades_stats')
     name = NameDescriptor()
     
     def __init__(self, name, subjects_file=None):
@@ -42,6 +125,7 @@ class Student:
         self.name = name
         self.subjects = {}
         self.subjects_file = subjects_file
+        self._all_grades_stats = RunningStats()
         if subjects_file:
             self.load_subjects(subjects_file)
 
@@ -56,7 +140,7 @@ class Student:
         if name == "name":
             super().__setattr__(name, value)
         else:
-            self.__dict__[name] = value
+            object.__setattr__(self, name, value)
 
     def load_subjects(self, subjects_file):
         """
@@ -72,19 +156,9 @@ class Student:
             if not os.path.exists(subjects_file):
                 raise FileNotFoundError(f"Файл {subjects_file} не найден")
             
-            with open(subjects_file, newline='', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
-                for row in reader:
-                    student_name = row['Студент']
-                    subject = row['Предмет']
-                    grade = int(row['Оценка'])
-                    test_score = int(row['Результат теста'])
-
-                    if student_name == self.name:
-                        if subject not in self.subjects:
-                            self.subjects[subject] = {'grades': [], 'test_scores': []}
-                        self.subjects[subject]['grades'].append(grade)
-                        self.subjects[subject]['test_scores'].append(test_score)
+            # Читаем через индекс только строки этого студента
+            for subject, grade, test_score in Gradebook.open(subjects_file).read_student(self.name):
+                self._add_to_subject(subject, grade, test_score)
         except FileNotFoundError as e:
             logging.warning(f"Файл с оценками {subjects_file} не найден")
             print(f"Файл с оценками {subjects_file} не найден")
@@ -92,6 +166,26 @@ class Student:
             logging.error(f"Ошибка загрузки предметов из файла {subjects_file}: {e}")
             raise
 
+    def _add_to_subject(self, subject, grade=None, test_score=None):
+        """
+        Добавление значений в данные предмета с обновлением накопленной статистики.
+
+        Args:
+            subject (str): Название предмета.
+            grade (int, optional): Оценка.
+            test_score (int, optional): Результат теста.
+        """
+        record = self.subjects.get(subject)
+        if record is None:
+            record = self.subjects[subject] = SubjectRecord()
+        if grade is not None:
+            record.grades.append(grade)
+            record.grade_stats.add(grade)
+            self._all_grades_stats.add(grade)
+        if test_score is not None:
+            record.test_scores.append(test_score)
+            record.test_score_stats.add(test_score)
+
     def add_grade(self, subject, grade):
         """
         Добавление оценки для указанного предмета и запись в файл.
@@ -105,11 +199,10 @@ class Student:
         """
         try:
             if subject not in self.subjects:
-                self.subjects[subject] = {'grades': [], 'test_scores': []}  # Создаем запись для нового предмета
-            if not isinstance(grade, int) or grade < 2 or grade > 5:
-                raise ValueError("Оценка должна быть целым числом от 2 до 5")
-            self.subjects[subject]['grades'].append(grade)
-            self._save_to_csv()
+                self.subjects[subject] = SubjectRecord()  # Создаем запись для нового предмета
+            validate_grade(grade)
+            self._add_to_subject(subject, grade=grade)
+            self._save_record(subject, grade=grade)
             logging.info(f"Добавлена оценка {grade} по предмету {subject} для студента {self.name}")
         except Exception as e:
             logging.error(f"Ошибка добавления оценки для предмета {subject}: {e}")
@@ -128,16 +221,40 @@ class Student:
         """
         try:
             if subject not in self.subjects:
-                self.subjects[subject] = {'grades': [], 'test_scores': []}  # Создаем запись для нового предмета
-            if not isinstance(test_score, int) or test_score < 0 or test_score > 100:
-                raise ValueError("Результат теста должен быть целым числом от 0 до 100")
-            self.subjects[subject]['test_scores'].append(test_score)
-            self._save_to_csv()
+                self.subjects[subject] = SubjectRecord()  # Создаем запись для нового предмета
+            validate_test_score(test_score)
+            self._add_to_subject(subject, test_score=test_score)
+            self._save_record(subject, test_score=test_score)
             logging.info(f"Добавлен результат теста {test_score} по предмету {subject} для студента {self.name}")
         except Exception as e:
             logging.error(f"Ошибка добавления результатов теста для предмета {subject}: {e}")
             raise
 
+    def add_many(self, grades=(), test_scores=()):
+        """
+        Добавление пакета оценок и результатов тестов одной записью в файл.
+
+        Сначала проверяется весь пакет; если хотя бы одно значение недопустимо,
+        ничего не добавляется.
+
+        Args:
+            grades (iterable): Пары (предмет, оценка).
+            test_scores (iterable): Пары (предмет, результат теста).
+
+        Raises:
+            ValueError: Если оценка или результат теста не соответствует допустимому диапазону.
+        """
+        try:
+            records = [(self.name, subject, validate_grade(grade), None) for subject, grade in grades]
+            records += [(self.name, subject, None, validate_test_score(test_score)) for subject, test_score in test_scores]
+            for _, subject, grade, test_score in records:
+                self._add_to_subject(subject, grade, test_score)
+            Gradebook.open(self.subjects_file).append_many(records)
+            logging.info(f"Добавлено записей: {len(records)} для студента {self.name}")
+        except Exception as e:
+            logging.error(f"Ошибка пакетного добавления для студента {self.name}: {e}")
+            raise
+
     def get_average_test_score(self, subject):
         """
         Вычисление среднего результата тестов для указанного предмета.
@@ -154,8 +271,7 @@ class Student:
         try:
             if subject not in self.subjects:
                 raise ValueError(f"Предмет {subject} не найден")
-            test_scores = self.subjects[subject]['test_scores']
-            return sum(test_scores) / len(test_scores) if test_scores else 0.0
+            return self.subjects[subject].test_score_stats.mean
         except Exception as e:
             logging.error(f"Ошибка вычисления среднего результата тестов для предмета {subject}: {e}")
             raise
@@ -171,33 +287,59 @@ class Student:
             ValueError: Если не удалось вычислить средний балл (например, отсутствуют оценки по предметам).
         """
         try:
-            total_grades = []
-            for subject in self.subjects:
-                total_grades.extend(self.subjects[subject]['grades'])
-            return sum(total_grades) / len(total_grades) if total_grades else 0.0
+            return self._all_grades_stats.mean
         except Exception as e:
             logging.error(f"Ошибка вычисления среднего балла: {e}")
             raise
 
-    def _save_to_csv(self):
+    def get_grade_stats(self, subject=None):
+        """
+        Статистика оценок (количество, среднее, минимум, максимум, дисперсия).
+
+        Args:
+            subject (str, optional): Название предмета; без него - по всем предметам.
+
+        Returns:
+            RunningStats: Накопленная статистика.
+
+        Raises:
+            ValueError: Если предмет не найден.
+        """
+        if subject is None:
+            return self._all_grades_stats
+        if subject not in self.subjects:
+            raise ValueError(f"Предмет {subject} не найден")
+        return self.subjects[subject].grade_stats
+
+    def get_test_score_stats(self, subject):
+        """
+        Статистика результатов тестов по предмету.
+
+        Args:
+            subject (str): Название предмета.
+
+        Returns:
+            RunningStats: Накопленная статистика.
+
+        Raises:
+            ValueError: Если предмет не найден.
         """
-        Сохранение данных о предметах и оценках в файл subjects.csv.
+        if subject not in self.subjects:
+            raise ValueError(f"Предмет {subject} не найден")
+        return self.subjects[subject].test_score_stats
+
+    def _save_record(self, subject, grade=None, test_score=None):
+        """
+        Дописывание новой записи о предмете в журнал файла subjects.csv.
+
+        Args:
+            subject (str): Название предмета.
+            grade (int, optional): Оценка.
+            test_score (int, optional): Результат теста.
         """
         try:
-            with open(self.subjects_file, mode='a', newline='', encoding='utf-8') as csvfile:
-                fieldnames = ['Студент', 'Предмет', 'Оценка', 'Результат теста']
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-
-                for subject, data in self.subjects.items():
-                    for i in range(max(len(data['grades']), len(data['test_scores']))):
-                        writer.writerow({
-                            'Студент': self.name,
-                            'Предмет': subject,
-                            'Оценка': data['grades'][i] if i < len(data['grades']) else '',
-                            'Результат теста': data['test_scores'][i] if i < len(data['test_scores']) else ''
-                        })
-
-            logging.info(f"Данные о предметах и оценках для студента {self.name} сохранены в файл {self.subjects_file}")
+            Gradebook.open(self.subjects_file).append(self.name, subject, grade=grade, test_score=test_score)
+            logging.info(f"Запись по предмету {subject} для студента {self.name} сохранена в файл {self.subjects_file}")
         except Exception as e:
             logging.error(f"Ошибка сохранения данных в файл {self.subjects_file}: {e}")
             raise
@@ -213,7 +355,85 @@ class Student:
         subjects_str = ", ".join(subjects_with_data)
         return f"Студент: {self.name}\nПредметы: {subjects_str}"
 
-if __name__ == "__main__":
+def import_records(import_file, subjects_file):
+    """
+    Массовый импорт оценок и результатов тестов из CSV файла.
+
+    Файл импорта имеет тот же заголовок, что и subjects.csv. Весь пакет проверяется
+    (ФИО, оценка от 2 до 5, результат теста от 0 до 100) и записывается одной операцией;
+    при ошибке в любой строке ничего не записывается.
+
+    Args:
+        import_file (str): Путь к файлу импорта.
+        subjects_file (str): Путь к файлу с предметами и оценками.
+
+    Returns:
+        int: Количество импортированных записей.
+
+    Raises:
+        ValueError: Если строка файла импорта не прошла проверку.
+    """
+    records = []
+    with open(import_file, newline='', encoding='utf-8-sig') as csvfile:
+        reader = csv.DictReader(csvfile)
+        for line_num, row in enumerate(reader, start=2):
+            try:
+                name = NameDescriptor.validate(row['Студент'])
+                grade = (row['Оценка'] or '').strip()
+                test_score = (row['Результат теста'] or '').strip()
+                if not grade and not test_score:
+                    raise ValueError("Не указаны ни оценка, ни результат теста")
+                records.append((
+                    name,
+                    row['Предмет'],
+                    validate_grade(int(grade)) if grade else None,
+                    validate_test_score(int(test_score)) if test_score else None,
+                ))
+            except (KeyError, ValueError) as e:
+                raise ValueError(f"Строка {line_num} файла {import_file}: {e}") from e
+    Gradebook.open(subjects_file).append_many(records)
+    logging.info(f"Импортировано записей: {len(records)} из файла {import_file}")
+    return len(records)
+
+def run_client(args):
+    """
+    Выполнение операций командной строки через сервис журнала оценок (gradebook_service.py).
+
+    Args:
+        args (argparse.Namespace): Аргументы командной строки.
+    """
+    from gradebook_service import GradebookClient
+
+    with GradebookClient(args.server) as client:
+        if not args.name:
+            print("Укажите имя студента. Доступные имена:")
+            for student in client.request('students'):
+                print(student)
+            return
+
+        if args.add_grade:
+            subject, grade = args.add_grade
+            client.request('add_grade', name=args.name, subject=subject, value=int(grade))
+            print(f"Добавлена оценка {grade} по предмету {subject}")
+
+        if args.add_test_score:
+            subject, test_score = args.add_test_score
+            client.request('add_test_score', name=args.name, subject=subject, value=int(test_score))
+            print(f"Добавлен результат теста {test_score} по предмету {subject}")
+
+        if args.average_grade:
+            print(f"Средний балл: {client.request('average_grade', name=args.name)}")
+
+        if args.average_test_score:
+            average_test_score = client.request('average_test_score', name=args.name, subject=args.average_test_score)
+            print(f"Средний результат по тестам по предмету {args.average_test_score}: {average_test_score}")
+
+        if not args.add_grade and not args.add_test_score and not args.average_grade and not args.average_test_score:
+            print(client.request('student', name=args.name))
+
+def main():
+    import argparse
+
     parser = argparse.ArgumentParser(description='Управление данными студента')
     parser.add_argument('name', metavar='name', type=str, nargs='?', help='Имя студента')
     parser.add_argument('--subjects_file', type=str, default='subjects.csv', help='Путь к файлу с предметами и оценками')
@@ -221,21 +441,49 @@ if __name__ == "__main__":
     parser.add_argument('--add_test_score', nargs=2, metavar=('subject', 'test_score'), help='Добавить результат теста по предмету')
     parser.add_argument('--average_grade', action='store_true', help='Вычислить средний балл по всем предметам')
     parser.add_argument('--average_test_score', type=str, metavar='subject', help='Вычислить средний результат по тестам по указанному предмету')
+    parser.add_argument('--cohort', choices=['students', 'subjects', 'percentiles', 'top', 'distribution'], help='Отчет по всем студентам журнала')
+    parser.add_argument('--top', type=int, default=10, help='Количество студентов для отчета --cohort top')
+    parser.add_argument('--compact', action='store_true', help='Слить журнал новых записей в основной файл')
+    parser.add_argument('--snapshot', action='store_true', help='Построить (обновить) бинарный снимок основного файла для быстрой загрузки')
+    parser.add_argument('--server', type=str, metavar='ADDRESS', help='Выполнить операции через сервис журнала оценок (путь к Unix сокету или host:port)')
+    parser.add_argument('--import', dest='import_file', type=str, metavar='FILE', help='Импортировать оценки и результаты тестов из CSV файла')
     args = parser.parse_args()
 
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-    logging.getLogger().addHandler(console_handler)
+    setup_logging(console=True)
 
     try:
+        if args.import_file:
+            count = import_records(args.import_file, args.subjects_file)
+            print(f"Импортировано записей: {count}")
+
+        if args.compact:
+            Gradebook.open(args.subjects_file).compact()
+            print(f"Журнал слит в файл {args.subjects_file}")
+
+        if args.snapshot:
+            gradebook = Gradebook.open(args.subjects_file)
+            if gradebook.snapshot() is None:
+                print(f"Снимок для файла {args.subjects_file} не построен (см. лог)")
+                sys.exit(1)
+            print(f"Снимок сохранен в файл {gradebook.snapshot_file}")
+
+        if args.cohort:
+            from analytics import CohortAnalytics
+
+            for line in CohortAnalytics.load(args.subjects_file).report(args.cohort, top=args.top):
+                print(line)
+            logging.info(f"Выведен отчет по всем студентам: {args.cohort}")
+
+        if not args.name and (args.import_file or args.compact or args.snapshot or args.cohort):
+            sys.exit(0)
+
+        if args.server:
+            run_client(args)
+            sys.exit(0)
+
         if not args.name:
-            students = set()
             try:
-                with open(args.subjects_file, newline='', encoding='utf-8') as csvfile:
-                    reader = csv.DictReader(csvfile)
-                    for row in reader:
-                        students.add(row['Студент'])
+                students = Gradebook.open(args.subjects_file).students()
             except FileNotFoundError:
                 logging.warning(f"Файл с предметами и оценками {args.subjects_file} не найден")
                 print(f"Файл с предметами и оценками {args.subjects_file} не найден")
@@ -279,3 +527,6 @@ if __name__ == "__main__":
     except Exception as e:
         logging.error(f"Ошибка выполнения скрипта: {e}")
         sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+# Проверки восстановления журнала оценок после сбоев: недописанные строки и пакеты
+# журнала (основной CSV без перевода строки в конце не обрезается), прерванное слияние до и после точки фиксации,
+# запрет повышения блокировки при незавершенном чтении и пропуск значений вне диапазона.
+# Запуск: python -m pytest tests
+
+import os
+import sys
+from collections import Counter
+from unittest import mock
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gradebook import BATCH_END, Gradebook  # noqa: E402
+
+BASE = [
+    ('Иван Иванов', 'Физика', 4, 50),
+    ('Иван Иванов', 'История', 5, None),
+    ('Петр Петров', 'Физика', 3, 70),
+]
+JOURNAL = [
+    ('Петр Петров', 'История', None, 90),
+    ('Анна Смирнова', 'Физика', 5, 100),
+]
+
+_real_replace = os.replace
+_real_remove = os.remove
+
+
+@pytest.fixture
+def subjects_file(tmp_path):
+    """
+    CSV с записями BASE (после слияния) и журнал с записями JOURNAL.
+    """
+    path = str(tmp_path / 'subjects.csv')
+    book = Gradebook(path)
+    book.append_many(BASE)
+    book.compact()
+    book.append_many(JOURNAL)
+    return path
+
+
+def rows(path):
+    """
+    Все записи хранилища, прочитанные новым экземпляром (как после перезапуска процесса).
+    """
+    return Counter(Gradebook(path).iter_rows())
+
+
+def assert_clean(path):
+    """
+    После восстановления не остается служебных файлов слияния.
+    """
+    book = Gradebook(path)
+    assert not os.path.exists(book.merging_file)
+    assert not os.path.exists(book.commit_file)
+
+
+def test_torn_journal_tail_is_cut(subjects_file):
+    book = Gradebook(subjects_file)
+    with open(book.journal_file, 'ab') as journal_file:
+        journal_file.write('Анна Смирнова,Ист'.encode('utf-8'))
+
+    assert rows(subjects_file) == Counter(BASE + JOURNAL)
+    with open(book.journal_file, 'rb') as journal_file:
+        assert journal_file.read().endswith(b'\n')
+
+
+def test_unfinished_batch_is_cut_whole(subjects_file):
+    # Сбой до маркера конца пакета: полные строки пакета тоже отрезаются
+    book = Gradebook(subjects_file)
+    with open(book.journal_file, 'ab') as journal_file:
+        journal_file.write('Анна Смирнова,История,4,\nАнна Смирнова,Химия,5,\n'.encode('utf-8'))
+
+    assert rows(subjects_file) == Counter(BASE + JOURNAL)
+    with open(book.journal_file, 'rb') as journal_file:
+        assert journal_file.read().endswith(BATCH_END)
+
+
+def test_journal_without_batch_markers(tmp_path):
+    # Журнал, записанный до появления маркеров: отрезается только оборванная строка
+    path = str(tmp_path / 'subjects.csv')
+    with open(path, 'w', encoding='utf-8') as csv_file:
+        csv_file.write('Студент,Предмет,Оценка,Результат теста\n')
+    with open(path + '.journal', 'w', encoding='utf-8') as journal_file:
+        journal_file.write('Иван Иванов,Физика,5,\nПетр Петров,Физика,4,\nАнна Смир')
+
+    assert rows(path) == Counter([('Иван Иванов', 'Физика', 5, None), ('Петр Петров', 'Физика', 4, None)])
+
+
+def test_csv_without_final_newline_is_kept(tmp_path):
+    # CSV, написанный вручную: последняя строка без перевода строки - полная запись, а не обрыв
+    path = str(tmp_path / 'subjects.csv')
+    data = 'Студент,Предмет,Оценка,Результат теста\nИван Иванов,Физика,5,80\nПетр Петров,Физика,4,'.encode('utf-8')
+    with open(path, 'wb') as csv_file:
+        csv_file.write(data)
+
+    assert rows(path) == Counter([('Иван Иванов', 'Физика', 5, 80), ('Петр Петров', 'Физика', 4, None)])
+    assert list(Gradebook(path).read_student('Петр Петров')) == [('Физика', 4, None)]
+    with open(path, 'rb') as csv_file:
+        assert csv_file.read() == data
+
+
+def test_compaction_interrupted_after_journal_rename(subjects_file):
+    # Сбой сразу после переименования журнала в merging_file: новый CSV еще не записан
+    with mock.patch.object(Gradebook, '_finish_compaction', side_effect=RuntimeError('сбой')):
+        with pytest.raises(RuntimeError):
+            Gradebook(subjects_file).compact()
+    assert os.path.exists(Gradebook(subjects_file).merging_file)
+
+    assert rows(subjects_file) == Counter(BASE + JOURNAL)
+    assert_clean(subjects_file)
+
+
+def test_compaction_interrupted_before_commit_point(subjects_file):
+    # Сбой перед заменой CSV: файл фиксации записан, но относится к временному файлу
+    def replace(src, dst):
+        if dst == subjects_file:
+            raise RuntimeError('сбой')
+        _real_replace(src, dst)
+
+    with mock.patch('gradebook.os.replace', side_effect=replace):
+        with pytest.raises(RuntimeError):
+            Gradebook(subjects_file).compact()
+    assert os.path.exists(Gradebook(subjects_file).commit_file)
+
+    assert rows(subjects_file) == Counter(BASE + JOURNAL)
+    assert_clean(subjects_file)
+
+
+def test_compaction_interrupted_after_commit_point(subjects_file):
+    # Сбой после замены CSV: повторное слияние продублировало бы записи журнала
+    merging_file = Gradebook(subjects_file).merging_file
+
+    def remove(path):
+        if path == merging_file:
+            raise RuntimeError('сбой')
+        _real_remove(path)
+
+    with mock.patch('gradebook.os.remove', side_effect=remove):
+        with pytest.raises(RuntimeError):
+            Gradebook(subjects_file).compact()
+    assert os.path.exists(merging_file)
+
+    assert rows(subjects_file) == Counter(BASE + JOURNAL)
+    assert_clean(subjects_file)
+
+
+def read_only_lock_file(path):
+    """
+    Подмена open в модуле gradebook: файл блокировки нельзя открыть на запись или создать,
+    как в каталоге без права записи (chmod не помогает, если тесты запущены от root).
+    """
+    lock_file = Gradebook(path).lock_file
+
+    def fake_open(file, mode='r', *args, **kwargs):
+        if file == lock_file and mode != 'r':
+            raise PermissionError(13, 'Permission denied', file)
+        return open(file, mode, *args, **kwargs)
+
+    return mock.patch('gradebook.open', side_effect=fake_open, create=True)
+
+
+def test_read_with_read_only_lock_file(subjects_file):
+    with read_only_lock_file(subjects_file):
+        assert rows(subjects_file) == Counter(BASE + JOURNAL)
+        with pytest.raises(PermissionError):
+            Gradebook(subjects_file).append('Иван Иванов', 'Физика', 5)
+
+
+def test_read_without_lock_file_in_read_only_directory(subjects_file):
+    os.remove(Gradebook(subjects_file).lock_file)
+    with read_only_lock_file(subjects_file):
+        assert rows(subjects_file) == Counter(BASE + JOURNAL)
+    assert not os.path.exists(Gradebook(subjects_file).lock_file)
+
+
+def test_write_during_unfinished_read_is_refused(subjects_file):
+    book = Gradebook(subjects_file)
+    records = book.read_student('Иван Иванов')
+    next(records)
+    with pytest.raises(RuntimeError):
+        book.append('Иван Иванов', 'Физика', 5)
+    records.close()
+
+    book.append('Иван Иванов', 'Физика', 5)
+    assert rows(subjects_file) == Counter(BASE + JOURNAL + [('Иван Иванов', 'Физика', 5, None)])
+
+
+def test_out_of_range_values_are_skipped(subjects_file):
+    with open(subjects_file, 'a', encoding='utf-8') as csv_file:
+        csv_file.write('Иван Иванов,Физика,1000,\nИван Иванов,История,,-3\n')
+
+    assert rows(subjects_file) == Counter(BASE + JOURNAL)
+
+
+def test_compaction_keeps_unparsed_rows(subjects_file):
+    # Поврежденные записи пропускаются при чтении, но слияние переносит их в CSV как есть
+    bad_rows = ['Иван Иванов,Физика,1000,90', 'Иван Иванов,Физика,abc,90']
+    with open(subjects_file, 'a', encoding='utf-8') as csv_file:
+        csv_file.write('\n'.join(bad_rows) + '\n')
+
+    Gradebook(subjects_file).compact()
+    assert rows(subjects_file) == Counter(BASE + JOURNAL)
+    with open(subjects_file, encoding='utf-8') as csv_file:
+        lines = csv_file.read().splitlines()
+    assert all(row in lines for row in bad_rows)
@@ -0,0 +1,46 @@
+# Проверки запуска сервиса журнала оценок на Unix сокете: сокет остановленного
+# сервиса удаляется, сокет работающего - нет.
+# Запуск: python -m pytest tests
+
+import errno
+import os
+import socket
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gradebook_service import remove_stale_socket  # noqa: E402
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='Unix сокеты недоступны')
+
+
+def test_stale_socket_is_removed(tmp_path):
+    path = str(tmp_path / 'gradebook.sock')
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()
+
+    remove_stale_socket(path)
+    assert not os.path.exists(path)
+
+
+def test_socket_of_running_service_is_kept(tmp_path):
+    path = str(tmp_path / 'gradebook.sock')
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(path)
+        server.listen()
+        with pytest.raises(OSError) as error:
+            remove_stale_socket(path)
+        assert error.value.errno == errno.EADDRINUSE
+        assert os.path.exists(path)
+
+
+def test_other_files_are_kept(tmp_path):
+    path = tmp_path / 'gradebook.sock'
+    path.write_text('не сокет')
+
+    remove_stale_socket(str(path))
+    assert path.exists()
+    remove_stale_socket(str(tmp_path / 'missing.sock'))
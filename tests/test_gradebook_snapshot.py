@@ -0,0 +1,115 @@
+# Проверки бинарного снимка журнала оценок: запись и чтение снимка, перестроение
+# при изменении CSV, отказ от обрезанного или чужого файла снимка и чтение через
+# CSV, если снимок не удалось сохранить.
+# Запуск: python -m pytest tests
+
+import os
+import sys
+from collections import Counter
+from unittest import mock
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gradebook import Gradebook  # noqa: E402
+from gradebook_snapshot import GradebookSnapshot  # noqa: E402
+
+ROWS = [
+    ('Иван Иванов', 'Физика', 4, 50),
+    ('Петр Петров', 'Физика', 3, None),
+    ('Иван Иванов', 'История', None, 100),
+    ('Анна Смирнова', 'Химия', 5, 0),
+]
+STAMP = [123, 456]
+
+
+@pytest.fixture
+def snapshot_file(tmp_path):
+    """
+    Файл снимка, записанный из ROWS для отметки STAMP.
+    """
+    path = str(tmp_path / 'subjects.csv.snap')
+    GradebookSnapshot.write(path, STAMP, ROWS)
+    return path
+
+
+@pytest.fixture
+def subjects_file(tmp_path):
+    """
+    CSV с записями ROWS без журнала.
+    """
+    path = str(tmp_path / 'subjects.csv')
+    book = Gradebook(path)
+    book.append_many(ROWS)
+    book.compact()
+    return path
+
+
+def test_round_trip(snapshot_file):
+    snapshot = GradebookSnapshot.load(snapshot_file, STAMP)
+
+    assert len(snapshot) == len(ROWS)
+    assert Counter(snapshot.iter_rows()) == Counter(ROWS)
+    assert list(snapshot.read_student('Иван Иванов')) == [('Физика', 4, 50), ('История', None, 100)]
+    assert list(snapshot.read_student('Нет Такого')) == []
+    assert snapshot.names == ['Иван Иванов', 'Петр Петров', 'Анна Смирнова']
+
+
+def test_stale_stamp_is_rejected(snapshot_file):
+    assert GradebookSnapshot.load(snapshot_file, [STAMP[0] + 1, STAMP[1]]) is None
+
+
+@pytest.mark.parametrize('damage', ['truncated', 'foreign', 'empty'])
+def test_damaged_file_is_rejected(snapshot_file, damage):
+    with open(snapshot_file, 'r+b') as file:
+        if damage == 'truncated':
+            file.truncate(os.path.getsize(snapshot_file) - 3)
+        elif damage == 'foreign':
+            file.write(b'PK\x03\x04')
+        else:
+            file.truncate(0)
+
+    assert GradebookSnapshot.load(snapshot_file, STAMP) is None
+
+
+def test_gradebook_reads_through_snapshot(subjects_file):
+    book = Gradebook(subjects_file)
+
+    assert book.snapshot() is not None
+    assert Counter(book.iter_rows()) == Counter(ROWS)
+    assert Counter(Gradebook(subjects_file, use_snapshot=False).iter_rows()) == Counter(ROWS)
+
+
+def test_snapshot_is_rebuilt_when_csv_changes(subjects_file):
+    book = Gradebook(subjects_file)
+    old = book.snapshot()
+    book.append('Петр Петров', 'История', 5)
+    book.compact()
+
+    new = book.snapshot()
+    assert new is not old and new.stamp != old.stamp
+    assert list(new.read_student('Петр Петров')) == [('Физика', 3, None), ('История', 5, None)]
+    # Новый экземпляр не берет устаревший снимок с диска
+    assert Counter(Gradebook(subjects_file).iter_rows()) == Counter(ROWS + [('Петр Петров', 'История', 5, None)])
+
+
+def test_damaged_snapshot_on_disk_is_rebuilt(subjects_file):
+    book = Gradebook(subjects_file)
+    book.snapshot()
+    with open(book.snapshot_file, 'r+b') as file:
+        file.truncate(10)
+
+    assert Counter(Gradebook(subjects_file).iter_rows()) == Counter(ROWS)
+    assert Gradebook(subjects_file).snapshot() is not None
+
+
+def test_unwritable_snapshot_falls_back_to_csv(subjects_file):
+    os.remove(Gradebook(subjects_file).snapshot_file)
+    with mock.patch.object(GradebookSnapshot, 'write', side_effect=PermissionError(13, 'Permission denied')) as write:
+        book = Gradebook(subjects_file)
+        assert list(book.read_student('Иван Иванов')) == [('Физика', 4, 50), ('История', None, 100)]
+        assert Counter(book.iter_rows()) == Counter(ROWS)
+        assert book.snapshot() is None
+    # Пока CSV не изменился, снимок не перестраивается при каждом чтении
+    assert write.call_count == 1